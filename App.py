@@ -1,5 +1,10 @@
+import json
 import streamlit as st
-import pandas as pd
+import figure_cache as fc
+import model_registry as mr
+import prewarm as pw
+import session_memory as sm
+import timing as tm
 
 
 st.set_page_config(
@@ -8,6 +13,12 @@ st.set_page_config(
     layout="wide"
 )
 
+# Timing spans of this rerun (sidebar with ?debug=timing), see timing.py
+tm.rerun()
+
+# Loads data, models, explainers and global SHAP in the background
+pw.start()
+
 st.markdown("""
 <style>
 /* Hero section */
@@ -121,7 +132,27 @@ st.markdown("""
 - Pau Colomer Coll (NIA: 268401)
 """)
 
-# Load CSV
-df = pd.read_csv("data.csv", sep=";")
-st.session_state["data"] = df
-st.success("File successfully loaded into session_state ✅")
+# Load CSV (parsed once per process, shared read-only by every session)
+with tm.span("app.data_load"):
+    pw.ready("data").result()
+st.success("File successfully loaded ✅")
+
+with st.expander("⏱️ Warm-up timings (s)"):
+    st.json(pw.timings())
+    st.caption("Loaded models: load time (s) and memory footprint (bytes)")
+    st.json(mr.model_info())
+    st.caption("Rendered figure cache (bytes)")
+    st.json(fc.stats())
+
+with st.expander("🧠 Session memory (bytes)"):
+    st.json(sm.report(st.session_state))
+    st.caption("This process")
+    st.json(sm.totals())
+
+with st.expander("📈 Span timings in this process (rolling p50/p95, ms)"):
+    span_stats = tm.stats()
+    st.json(span_stats)
+    st.download_button("Export span timings (JSON)", json.dumps(span_stats, indent=2),
+                       file_name="span_timings.json", mime="application/json")
+
+tm.panel()
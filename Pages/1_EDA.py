@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import LabelEncoder
+import prewarm as pw
+import data_loader as dl
+import figure_cache as fc
+import eda_aggregates as ea
+import eda_charts as ch
+import correlation as cr
+import timing as tm
 
 
 st.set_page_config(
@@ -10,6 +13,7 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+tm.rerun()
 
 
 
@@ -63,12 +67,14 @@ with top_col2:
 
 st.markdown("---")
 
-# Load data, saved for all pages in session state
-try:
-    df = st.session_state["data"]
-except KeyError:
-    st.error("❌ Data not loaded. Please return to the home page to upload the dataset.")
-    st.stop()
+# Load data: one read-only DataFrame per process, shared by all sessions (never copied into session_state)
+# Rendered plots and chart summaries are cached per data version, taken from the
+# same load as the frame so a changed data.csv never lands under a stale key
+with tm.span("eda.data_load"):
+    pw.ready("data").result()
+    data_version, df = dl.load_versioned("data.csv")
+with tm.span("eda.summary"):
+    summary = ea.get(df, data_version)
 
 
 with st.container():
@@ -87,7 +93,7 @@ st.markdown("<div class='section-card'>", unsafe_allow_html=True)
 st.subheader("📌 Key Performance Indicators (KPIs)")
 
 # --- Càlcul de percentatges del Target ---
-target_counts = df['Target'].value_counts(normalize=True) * 100
+target_counts = summary["kpis"]["target_pct"]
 
 t_col1, t_col2, t_col3 = st.columns(3)
 
@@ -101,25 +107,20 @@ with t_col3:
     # Busca 'Graduate' o 'Graduated' per si de cas
     grad_val = target_counts.get('Graduate', target_counts.get('Graduated', 0))
     st.metric("🎓 Graduation Rate", f"{grad_val:.1f}%")
-    
-prev_grade = df["Previous qualification (grade)"].mean()
-admission_grade = df["Admission grade"].mean()
 
-no_enrolled_1 = (df["Curricular units 1st sem (enrolled)"] == 0).sum() #0 enrolled subjects
-diff_1 = df["Curricular units 1st sem (enrolled)"] - df["Curricular units 1st sem (approved)"]
-all_passed_1 = (diff_1 == 0).sum() - no_enrolled_1 #all enrolled passed
-approved_1 = all_passed_1 / (len(df) - no_enrolled_1) * 100
+means = summary["kpis"]["means"]
+prev_grade = means["Previous qualification (grade)"]
+admission_grade = means["Admission grade"]
 
-no_enrolled_2 = (df["Curricular units 2nd sem (enrolled)"] == 0).sum() #0 enrolled subjects
-diff_2 = df["Curricular units 2nd sem (enrolled)"] - df["Curricular units 2nd sem (approved)"]
-all_passed_2 = (diff_2 == 0).sum() - no_enrolled_2 #all enrolled passed
-approved_2 = all_passed_2 / (len(df) - no_enrolled_2) * 100
+#all enrolled passed, over students with at least 1 enrolled subject
+approved_1 = summary["kpis"]["approved_1"]
+approved_2 = summary["kpis"]["approved_2"]
 
 #Grades between 0-20
-grade_1 = df["Curricular units 1st sem (grade)"].mean()
-grade_2 = df["Curricular units 2nd sem (grade)"].mean()
-enrolled_1 = df["Curricular units 1st sem (enrolled)"].mean()
-enrolled_2 = df["Curricular units 2nd sem (enrolled)"].mean()
+grade_1 = means["Curricular units 1st sem (grade)"]
+grade_2 = means["Curricular units 2nd sem (grade)"]
+enrolled_1 = means["Curricular units 1st sem (enrolled)"]
+enrolled_2 = means["Curricular units 2nd sem (enrolled)"]
 
 col1, col2, col3, col4 = st.columns(4)
 
@@ -141,10 +142,6 @@ with col4:
 
 st.markdown("</div>", unsafe_allow_html=True)
 
-# separate datasets
-df_drop = df[df['Target'] == 'Dropout']
-df_no_drop = df[df['Target'] != 'Dropout']
-
 category_mappings = {
     'Gender': {1: 'Male', 0: 'Female'},
     'Marital status': {
@@ -158,210 +155,139 @@ category_mappings = {
     'Daytime/evening attendance': {1: 'Daytime', 0: 'Evening'},
 }
 
-categorical_cols = [
-    'Gender', 'Marital status', 'Displaced', 'Scholarship holder',
-    'Tuition fees up to date', 'Educational special needs', 'Daytime/evening attendance\t'
-]
-
-kpi_columns = [
-    'Admission grade',
-    'Previous qualification (grade)',
-    'Age at enrollment',
-    'Curricular units 1st sem (grade)',
-    'Curricular units 1st sem (enrolled)',
-    'Curricular units 1st sem (evaluations)',
-    'Curricular units 2nd sem (grade)',
-    'Curricular units 2nd sem (enrolled)',
-    'Curricular units 2nd sem (evaluations)',
-    'Inflation rate',
-    'GDP'
-]
-
-color_palette = plt.cm.Set2.colors
-palette = sns.color_palette("Set2", 2)
-color_map = {"Dropout": palette[0], "No Dropout": palette[1]}
+categorical_cols = ea.CATEGORICAL_COLS
+kpi_columns = ea.KPI_COLUMNS
 
-# Pie Charts for categorical variables
-st.markdown("<div class='section-card'>", unsafe_allow_html=True)
-st.subheader("🥧📊 Dropout vs No Dropout — Categorical Variables")
-st.write("Select categorical variables to view their distribution between dropout and non-dropout students.")
+# The figures are built by eda_charts, only when a plot is not in figure_cache yet,
+# so most page loads never import matplotlib or seaborn
 
-selected_cats = st.multiselect("Categorical variables:", categorical_cols)
+# Each chart section is a fragment: changing its multiselect (or the correlation toggle)
+# reruns only that section, not the data load, the KPIs and the other charts
 
-for col_selected in selected_cats:
-    if col_selected not in df.columns:
-        st.warning(f"⚠️ The column {col_selected} does not exist in the DataFrame.")
-        continue
+# Pie Charts for categorical variables
+@st.fragment
+@tm.timed("eda.categorical")
+def categorical_section():
+    st.markdown("<div class='section-card'>", unsafe_allow_html=True)
+    st.subheader("🥧📊 Dropout vs No Dropout — Categorical Variables")
+    st.write("Select categorical variables to view their distribution between dropout and non-dropout students.")
 
-    counts_drop = df_drop[col_selected].value_counts()
-    counts_no_drop = df_no_drop[col_selected].value_counts()
+    selected_cats = st.multiselect("Categorical variables:", categorical_cols)
 
-    mapped_labels_drop = pd.Series(counts_drop.index.map(category_mappings.get(col_selected, {}).get))
-    labels_drop = mapped_labels_drop.fillna(pd.Series(counts_drop.index)).tolist()
+    for col_selected in selected_cats:
+        if col_selected not in df.columns:
+            st.warning(f"⚠️ The column {col_selected} does not exist in the DataFrame.")
+            continue
 
-    mapped_labels_no_drop = pd.Series(counts_no_drop.index.map(category_mappings.get(col_selected, {}).get))
-    labels_no_drop = mapped_labels_no_drop.fillna(pd.Series(counts_no_drop.index)).tolist()
+        def draw_pie():
+            return ch.pie(summary["contingency"][col_selected], col_selected, category_mappings.get(col_selected))
 
-    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-    axes[0].pie(
-        counts_drop,
-        labels=labels_drop,
-        autopct='%1.1f%%',
-        startangle=140,
-        pctdistance=0.85,
-        colors=color_palette[:len(counts_drop)]
-    )
-    axes[0].set_title(f'{col_selected} — Dropout')
-
-    axes[1].pie(
-        counts_no_drop,
-        labels=labels_no_drop,
-        autopct='%1.1f%%',
-        startangle=140,
-        pctdistance=0.85,
-        colors=color_palette[:len(counts_no_drop)]
-    )
-    axes[1].set_title(f'{col_selected} — No Dropout')
+        st.image(fc.render(("pie", col_selected, data_version), draw_pie), width="stretch")
 
-    plt.suptitle(f'Distribution of {col_selected}', fontsize=14)
-    st.pyplot(fig)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-st.markdown("</div>", unsafe_allow_html=True)
+categorical_section()
 
 # Distribution plots for numerical variables
-st.markdown("<div class='section-card'>", unsafe_allow_html=True)
-st.subheader("📈 Numeric KPI Distributions (Dropout vs No Dropout)")
-st.write("Explore numeric variable distributions and compare the behavior between both groups.")
-
-selected_kpis = st.multiselect("Numeric variables:", kpi_columns)
-
-for col in selected_kpis:
-    if col not in df.columns:
-        st.warning(f"⚠️ The column {col} does not exist in the DataFrame.")
-        continue
-
-    fig, axes = plt.subplots(1, 2, figsize=(12, 4), sharey=True)
-
-    sns.histplot(
-        data=df_drop,
-        x=col,
-        kde=True,
-        ax=axes[0],
-        stat="density",
-        color=color_map["Dropout"],
-        alpha=0.7
-    )
-    axes[0].set_title(f'{col} — Dropout')
-    axes[0].set_xlabel(col)
-    axes[0].set_ylabel('Density')
-
-    sns.histplot(
-        data=df_no_drop,
-        x=col,
-        kde=True,
-        ax=axes[1],
-        stat="density",
-        color=color_map["No Dropout"],
-        alpha=0.7
-    )
-    axes[1].set_title(f'{col} — No Dropout')
-    axes[1].set_xlabel(col)
-    axes[1].set_ylabel('Density')
-
-    plt.suptitle(f'Distribution of {col} (Dropout vs No Dropout)', fontsize=14)
-    plt.tight_layout()
-    st.pyplot(fig)
-    
-st.markdown("</div>", unsafe_allow_html=True)
+@st.fragment
+@tm.timed("eda.numeric")
+def numeric_section():
+    st.markdown("<div class='section-card'>", unsafe_allow_html=True)
+    st.subheader("📈 Numeric KPI Distributions (Dropout vs No Dropout)")
+    st.write("Explore numeric variable distributions and compare the behavior between both groups.")
 
+    selected_kpis = st.multiselect("Numeric variables:", kpi_columns)
 
-st.markdown("<div class='section-card'>", unsafe_allow_html=True)
-st.subheader("📌 Feature Relationships — Dropout vs No Dropout")
-st.write("Select feature pairs to visualize relationships between dropout and non-dropout students.")
-
-# Define feature pairs with user-friendly labels
-scatter_pairs = {
-    "Admission grade vs 1st Sem Grade": ("Admission grade", "Curricular units 1st sem (grade)"),
-    "Age vs Admission grade": ("Age at enrollment", "Admission grade"),
-    "1st vs 2nd Sem Grade": ("Curricular units 1st sem (grade)", "Curricular units 2nd sem (grade)"),
-    "1st Sem Approved vs 1st Sem Grade": ("Curricular units 1st sem (approved)", "Curricular units 1st sem (grade)")
-}
+    for col in selected_kpis:
+        if col not in df.columns:
+            st.warning(f"⚠️ The column {col} does not exist in the DataFrame.")
+            continue
 
-# User selects which plots to show
-selected_scatter_plots = st.multiselect(
-    "Choose feature relationships to view:",
-    list(scatter_pairs.keys())
-)
+        def draw_hist():
+            return ch.histogram(summary["histograms"][col], col)
 
-color_drop = "#FF6666"
-color_no_drop = "#4CAF50"
+        st.image(fc.render(("hist", col, data_version), draw_hist), width="stretch")
 
-for label in selected_scatter_plots:
-    x_col, y_col = scatter_pairs[label]
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5), sharex=True, sharey=True)
+numeric_section()
 
-    # Dropout Scatter
-    axes[0].scatter(df_drop[x_col], df_drop[y_col], alpha=0.7, color=color_drop, edgecolor='black')
-    axes[0].set_title("Dropout")
-    axes[0].set_xlabel(x_col)
-    axes[0].set_ylabel(y_col)
 
-    # No Dropout Scatter
-    axes[1].scatter(df_no_drop[x_col], df_no_drop[y_col], alpha=0.7, color=color_no_drop, edgecolor='black')
-    axes[1].set_title("No Dropout")
-    axes[1].set_xlabel(x_col)
-    axes[1].set_ylabel(y_col)
+@st.fragment
+@tm.timed("eda.scatter")
+def scatter_section():
+    st.markdown("<div class='section-card'>", unsafe_allow_html=True)
+    st.subheader("📌 Feature Relationships — Dropout vs No Dropout")
+    st.write("Select feature pairs to visualize relationships between dropout and non-dropout students.")
+
+    # Define feature pairs with user-friendly labels
+    scatter_pairs = {
+        "Admission grade vs 1st Sem Grade": ("Admission grade", "Curricular units 1st sem (grade)"),
+        "Age vs Admission grade": ("Age at enrollment", "Admission grade"),
+        "1st vs 2nd Sem Grade": ("Curricular units 1st sem (grade)", "Curricular units 2nd sem (grade)"),
+        "1st Sem Approved vs 1st Sem Grade": ("Curricular units 1st sem (approved)", "Curricular units 1st sem (grade)")
+    }
+
+    # User selects which plots to show
+    selected_scatter_plots = st.multiselect(
+        "Choose feature relationships to view:",
+        list(scatter_pairs.keys())
+    )
 
-    plt.suptitle(label, fontsize=14)
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Above ea.SCATTER_MAX_POINTS rows the points are binned and shaded instead of drawn one by one
+    binned_scatter = len(df) > ea.SCATTER_MAX_POINTS
 
-st.markdown("</div>", unsafe_allow_html=True)
+    for label in selected_scatter_plots:
+        x_col, y_col = scatter_pairs[label]
+
+        def draw_scatter():
+            return ch.scatter(df, x_col, y_col, label)
+
+        def draw_density():
+            return ch.scatter_density(ea.scatter_grid(df, x_col, y_col, data_version), x_col, y_col, label)
+
+        if binned_scatter:
+            st.image(fc.render(("scatter_density", x_col, y_col, data_version), draw_density), width="stretch")
+        else:
+            st.image(fc.render(("scatter", x_col, y_col, data_version), draw_scatter), width="stretch")
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+scatter_section()
 
 
 # Initialize session state for toggle
 if "show_corr" not in st.session_state:
     st.session_state.show_corr = False
 
-st.markdown("<div class='section-card'>", unsafe_allow_html=True)
-st.subheader("🔗 Feature Correlation Matrix")
-
-# Toggle Show/Hide
-if st.button("👁️ Show / Hide Correlation Matrix"):
-    st.session_state.show_corr = not st.session_state.show_corr
+@st.fragment
+@tm.timed("eda.correlation")
+def correlation_section():
+    st.markdown("<div class='section-card'>", unsafe_allow_html=True)
+    st.subheader("🔗 Feature Correlation Matrix")
 
-# Display only if toggled ON
-if st.session_state.show_corr:
+    # Toggle Show/Hide
+    if st.button("👁️ Show / Hide Correlation Matrix"):
+        st.session_state.show_corr = not st.session_state.show_corr
 
-    st.write("Correlation between numerical features and dropout outcome.")
+    # Display only if toggled ON
+    if st.session_state.show_corr:
 
-    # Create copy to encode target
-    df_corr = df.copy()
+        st.write("Correlation between numerical features and dropout outcome.")
 
-    le = LabelEncoder()
-    df_corr['target_encoded'] = le.fit_transform(df_corr['Target'])
+        # Cached per data version, no copy of the frame (see correlation.py)
+        correlations = cr.get(df, data_version)
 
-    # Select numeric columns
-    numerical_cols = df_corr.select_dtypes(include=['float64', 'int64']).columns.tolist()
+        def draw_corr():
+            return ch.correlation_heatmap(correlations["pearson"])
 
-    if 'target_encoded' in numerical_cols:
-        numerical_cols.remove('target_encoded')
-    numerical_cols.append('target_encoded')
+        st.image(fc.render(("corr", data_version), draw_corr), width="stretch")
 
-    corr_matrix = df_corr[numerical_cols].corr()
+        st.write("Association of each numerical feature with the encoded target.")
+        st.dataframe(correlations["target"].sort_values("mutual_info", ascending=False), width="stretch")
 
-    # Create heatmap
-    fig, ax = plt.subplots(figsize=(20, 18))
-    sns.heatmap(
-        corr_matrix,
-        cmap='coolwarm',
-        annot=False,
-        linewidths=.5,
-        ax=ax
-    )
-    ax.set_title("Correlation Matrix of Numerical Features & Encoded Target", fontsize=16)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    st.pyplot(fig)
+correlation_section()
 
-st.markdown("</div>", unsafe_allow_html=True)
+tm.panel()
@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import shap
-import pickle
-import matplotlib.pyplot as plt
-import variables as vr  
+import data_loader as dl
+import model_registry as mr
+import features as fs
+import explainers as ex
+import prewarm as pw
+import figure_cache as fc
+import schema as sc
+import timing as tm
 
 st.set_page_config(page_title="Explainability", page_icon="🧩", layout="wide")
+tm.rerun()
 
 
 st.markdown("""
@@ -68,130 +72,26 @@ with top_col2:
     st.write("Analyze feature impact on dropout probability (Global) and explain specific predictions (Local).")
 
 
-@st.cache_resource
-def load_model(path):
-    with open(path, "rb") as f:
-        return pickle.load(f)
-
-@st.cache_data
-def load_static_data():
-    if "data" in st.session_state and isinstance(st.session_state["data"], pd.DataFrame):
-        return st.session_state["data"]
-    return pd.read_csv("data.csv", sep=";")
-
-def preprocess_data(df):
-    rename_dict = {
-        "Marital status": "marital", "Application mode": "app_mode", "Application order": "app_order",
-        "Course": "course", "Daytime/evening attendance\t": "attendance", "Previous qualification": "prev_qual",
-        "Previous qualification (grade)": "prev_grade", "Nacionality": "nationality", 
-        "Mother's qualification": "mother_qual", "Father's qualification": "father_qual",
-        "Mother's occupation": "mother_job", "Father's occupation": "father_job",
-        "Admission grade": "admission_grade", "Displaced": "displaced",
-        "Educational special needs": "special_needs", "Debtor": "debtor", "Tuition fees up to date": "fees",
-        "Gender": "gender", "Scholarship holder": "scholarship", "Age at enrollment": "age",
-        "International": "international", "Curricular units 1st sem (credited)": "cred_1",
-        "Curricular units 1st sem (enrolled)": "enrolled_1", "Curricular units 1st sem (evaluations)": "evals_1",
-        "Curricular units 1st sem (approved)": "approved_1", "Curricular units 1st sem (grade)": "grade_1",
-        "Curricular units 1st sem (without evaluations)": "no_evals_1", "Curricular units 2nd sem (credited)": "cred_2",
-        "Curricular units 2nd sem (enrolled)": "enrolled_2", "Curricular units 2nd sem (evaluations)": "evals_2",
-        "Curricular units 2nd sem (approved)": "approved_2", "Curricular units 2nd sem (grade)": "grade_2",
-        "Curricular units 2nd sem (without evaluations)": "no_evals_2", "Unemployment rate": "unemployment",
-        "Inflation rate": "inflation", "GDP": "gdp", "Target": "target"
-    }
-    df = df.rename(columns=rename_dict)
-    
-    df_bin = df.copy()
-    if "target" in df_bin.columns:
-        df_bin["target_bin"] = df_bin["target"].replace({"Dropout": 0, "Graduate": 1, "Enrolled": 1})
-        df_bin = df_bin.drop(columns=["target"])
-        X = df_bin.drop(columns=["target_bin"])
-        y = df_bin["target_bin"]
-    else:
-        X = df_bin
-        y = None
-    return X, y
-
-def align_features(df, pipeline):
-    for step in ["imputer", "scaler", "model"]:
-        if hasattr(pipeline.named_steps[step], "feature_names_in_"):
-            return df[list(pipeline.named_steps[step].feature_names_in_)]
-    return df
-
-@st.cache_data(show_spinner=False)
-def compute_global_shap_sampled(_pipeline, X, sample_size=300):
-    if len(X) > sample_size:
-        X_sample = X.sample(sample_size, random_state=42)
-    else:
-        X_sample = X
-
-    imp = _pipeline.named_steps["imputer"]
-    scl = _pipeline.named_steps["scaler"]
-    model = _pipeline.named_steps["model"]
-    
-    X_tr = scl.transform(imp.transform(X_sample))
-    
-    explainer = shap.TreeExplainer(model)
-    shap_values = explainer.shap_values(X_tr, check_additivity=False)
-    
-    arr = np.array(shap_values)
-    if isinstance(shap_values, list):
-        shap_out = shap_values[1]
-    elif arr.ndim == 3:
-        shap_out = arr[:, :, 1]
-    else:
-        shap_out = arr
-
-    return shap_out, X_sample
+def shared_features(pipeline):
+    # (data version, model features of the whole dataset), built once per data version for every session
+    names = fs.model_features(pipeline)
+    return dl.view_versioned(("model_frame",) + names, lambda df: fs.model_frame(df, names), "data.csv")
 
 # Numbers to text
 def get_readable_df(df_input):
-    df_nice = df_input.copy()
-    
-    mappings = {
-        "marital": vr.marital_status, "marital_nc": vr.marital_status,
-        "app_mode": vr.application_mode, "app_mode_nc": vr.application_mode,
-        "course": vr.courses, "course_nc": vr.courses,
-        "attendance": vr.attendance, "attendance_nc": vr.attendance,
-        "prev_qual": vr.previous_qualification, "prev_qual_nc": vr.previous_qualification,
-        "nationality": vr.nationalities, "nationality_nc": vr.nationalities,
-        "gender": vr.gender, "gender_nc": vr.gender,
-        "mother_qual": vr.mother_qual, "mother_qual_nc": vr.mother_qual,
-        "father_qual": vr.fathers_qualification, "father_qual_nc": vr.fathers_qualification,
-        "mother_job": vr.mothers_occupation, "mother_job_nc": vr.mothers_occupation,
-        "father_job": vr.fathers_occupation, "father_job_nc": vr.fathers_occupation,
-        "displaced": vr.yes_no, "displaced_nc": vr.yes_no,
-        "special_needs": vr.yes_no, "special_nc": vr.yes_no,
-        "scholarship": vr.yes_no, "scholarship_nc": vr.yes_no,
-        "international": vr.yes_no, "international_nc": vr.yes_no,
-        "debtor": vr.yes_no, "debtor_nc": vr.yes_no,
-        "fees": vr.yes_no, "fees_nc": vr.yes_no,
-    }
-
-    for col, map_dict in mappings.items():
-        if col in df_nice.columns:
-            df_nice[col] = df_nice[col].map(map_dict).fillna(df_nice[col])
-            
-    return df_nice
-
-raw_df = load_static_data() 
-X_raw, _ = preprocess_data(raw_df) #Column names
-
-model_full = load_model("course_model.pkl")
-model_nocourse = load_model("nocourse_model.pkl")
-
-X_full = align_features(X_raw, model_full)
-X_red = align_features(X_raw, model_nocourse)
-
-if "shap_global_calculated" not in st.session_state:
-    with st.spinner("🧠 Calculating Global Explainability..."):
-        shap_full, X_full_sample = compute_global_shap_sampled(model_full, X_full, sample_size=300)
-        shap_red, X_red_sample = compute_global_shap_sampled(model_nocourse, X_red, sample_size=300)
-        
-        st.session_state.update({
-            "shap_full": shap_full, "X_full_sample": X_full_sample,
-            "shap_red": shap_red, "X_red_sample": X_red_sample,
-            "shap_global_calculated": True
-        })
+    return sc.decode_frame(df_input)
+
+with st.spinner("Loading models and explainers..."), tm.span("explainability.explainers"):
+    pw.ready("explainers").result()
+
+model_full = mr.get_model(mr.COURSE_MODEL)
+model_nocourse = mr.get_model(mr.NOCOURSE_MODEL)
+
+data_version, X_full = shared_features(model_full)
+red_version, X_red = shared_features(model_nocourse)
+
+# model_version is part of the cache key, so a hot-swapped pickle is re-explained
+model_versions = (mr.model_version(mr.COURSE_MODEL), mr.model_version(mr.NOCOURSE_MODEL))
 
 tab_global, tab_local = st.tabs(["🌍 Global Explainability", "🎯 Local Explainability"])
 
@@ -200,23 +100,57 @@ with tab_global:
     st.subheader("🌍 Feature Importance (Global)")
     st.write("These plots show which features drive the model's decisions on average.")
 
+    # Full-population SHAP written by precompute_shap.py, if available for these models/data
+    with tm.span("explainability.global_shap_load"):
+        shap_full_all = ex.load_global_shap(mr.COURSE_MODEL, model_versions[0], data_version)
+        shap_red_all = ex.load_global_shap(mr.NOCOURSE_MODEL, model_versions[1], red_version)
+
+    if shap_full_all is not None and shap_red_all is not None:
+        n_rows = len(X_full)
+        sample_size = st.slider("Students included in the plots", min_value=min(100, n_rows),
+                                max_value=n_rows, value=min(1000, n_rows), step=100)
+        idx = ex.sample_rows(n_rows, sample_size)
+        shap_full, X_full_sample = shap_full_all[idx], X_full.iloc[idx]
+        shap_red, X_red_sample = shap_red_all[idx], X_red.iloc[idx]
+        shap_source = "precomputed"
+    else:
+        st.info("ℹ️ Showing a 300-student sample. Run `python precompute_shap.py` to explain the full population.")
+        # The sampled SHAP values live in the process-wide cache, not in session_state
+        with st.spinner("🧠 Calculating Global Explainability..."), tm.span("explainability.global_shap"):
+            pw.ready("global_shap").result()
+            shap_full, X_full_sample = ex.compute_global_shap_sampled(model_full, model_versions[0], X_full, data_version, sample_size=300)
+            shap_red, X_red_sample = ex.compute_global_shap_sampled(model_nocourse, model_versions[1], X_red, red_version, sample_size=300)
+        # a different 300-row sample than the precomputed path with the slider at 300
+        shap_source = "sampled"
+
     sub_t1, sub_t2 = st.tabs(["📚 With Course Performance", "🚫 Without Course Performance"])
 
-    def plot_shap(shap_vals, X_dat):
-        fig, ax = plt.subplots()
-        shap.summary_plot(shap_vals, X_dat, show=False)
-        st.pyplot(fig)
-        plt.close(fig)
-        
-        fig2, ax2 = plt.subplots()
-        shap.summary_plot(shap_vals, X_dat, plot_type="bar", show=False)
-        st.pyplot(fig2)
-        plt.close(fig2)
+    # shap and matplotlib are imported by the draw functions, which only run when the
+    # plot is not in figure_cache yet
+    def plot_shap(shap_vals, X_dat, key):
+        def draw_summary():
+            import matplotlib.pyplot as plt
+            import shap
+
+            fig, ax = plt.subplots()
+            shap.summary_plot(shap_vals, X_dat, show=False)
+            return fig
+
+        def draw_bar():
+            import matplotlib.pyplot as plt
+            import shap
+
+            fig2, ax2 = plt.subplots()
+            shap.summary_plot(shap_vals, X_dat, plot_type="bar", show=False)
+            return fig2
+
+        st.image(fc.render(("shap_summary",) + key, draw_summary), width="stretch")
+        st.image(fc.render(("shap_bar",) + key, draw_bar), width="stretch")
 
-    with sub_t1:
-        plot_shap(st.session_state["shap_full"], st.session_state["X_full_sample"])
-    with sub_t2:
-        plot_shap(st.session_state["shap_red"], st.session_state["X_red_sample"])
+    with sub_t1, tm.span("explainability.global_plots.course"):
+        plot_shap(shap_full, X_full_sample, (shap_source, model_versions[0], data_version, len(X_full_sample)))
+    with sub_t2, tm.span("explainability.global_plots.nocourse"):
+        plot_shap(shap_red, X_red_sample, (shap_source, model_versions[1], red_version, len(X_red_sample)))
 
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -225,6 +159,7 @@ with tab_local:
 
     if "last_model" not in st.session_state:
         st.warning("⚠️ No prediction found. Please go to the **Predictor** page first.")
+        tm.panel()
         st.stop()
     
     last_model_name = st.session_state["last_model"]
@@ -234,49 +169,44 @@ with tab_local:
     st.info(f"ℹ️ Explaining last prediction using model: **{last_model_name}**")
 
     if last_model_name == "course":
-        pipeline = model_full
-        X_input = st.session_state.get("X_df_course")
+        pipeline, version = model_full, model_versions[0]
+        X_row = st.session_state.get("X_course")
         prob = st.session_state.get("dropout_course")
     else:
-        pipeline = model_nocourse
-        X_input = st.session_state.get("X_df_nocourse")
+        pipeline, version = model_nocourse, model_versions[1]
+        X_row = st.session_state.get("X_nocourse")
         prob = st.session_state.get("dropout_nocourse")
 
-    if X_input is None:
+    if X_row is None:
         st.error("Error retrieving prediction data.")
+        tm.panel()
         st.stop()
 
-    # Calculate SHAP
-    imp = pipeline.named_steps["imputer"]
-    scl = pipeline.named_steps["scaler"]
-    model = pipeline.named_steps["model"]
-    X_trans = scl.transform(imp.transform(X_input))
-    explainer = shap.TreeExplainer(model)
-    shap_values_single = explainer.shap_values(X_trans)
-    
-    if isinstance(shap_values_single, list):
-        sv = shap_values_single[1][0]
-        base_val = explainer.expected_value[1]
-    elif np.array(shap_values_single).ndim == 3:
-        sv = shap_values_single[0, :, 1]
-        base_val = explainer.expected_value[1]
-    else:
-        sv = shap_values_single[0]
-        base_val = explainer.expected_value
+    # Only for display, the model works on the feature array directly
+    X_input = pd.DataFrame(X_row, columns=fs.model_features(pipeline))
 
-    exp = shap.Explanation(
-        values=sv, base_values=base_val,
-        data=X_input.iloc[0].values, feature_names=X_input.columns
-    )
+    # Calculate SHAP (explainer and explanation cached per model version / input row)
+    with tm.span("explainability.local_shap"):
+        sv, base_val = ex.explain_row(pipeline, version, X_row)
 
     col_viz1, col_viz2 = st.columns([2, 1])
 
     with col_viz1:
         st.markdown("#### Waterfall Plot")
-        fig_water = plt.figure(figsize=(8, 6))
-        shap.plots.waterfall(exp, show=False)
-        st.pyplot(fig_water)
-        plt.close(fig_water)
+        def draw_waterfall():
+            import matplotlib.pyplot as plt
+            import shap
+
+            exp = shap.Explanation(
+                values=sv, base_values=base_val,
+                data=X_input.iloc[0].values, feature_names=X_input.columns
+            )
+            fig_water = plt.figure(figsize=(8, 6))
+            shap.plots.waterfall(exp, show=False)
+            return fig_water
+
+        with tm.span("explainability.waterfall"):
+            st.image(fc.render(("waterfall",) + ex.row_key(version, X_row), draw_waterfall), width="stretch")
 
     with col_viz2:
         st.markdown("#### Prediction Result")
@@ -294,4 +224,6 @@ with tab_local:
         readable_df = get_readable_df(X_input)
         st.dataframe(readable_df.T, use_container_width=True)
 
-    st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown("</div>", unsafe_allow_html=True)
+
+tm.panel()
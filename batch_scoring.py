@@ -0,0 +1,70 @@
+# batch_scoring.py
+# Scores a whole cohort (data.csv-shaped file) with both models in one go.
+#
+#   python batch_scoring.py data.csv scores.csv --chunksize 50000
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import features as fs
+import model_registry as mr
+
+MODELS = {
+    "dropout_course": mr.COURSE_MODEL,
+    "dropout_nocourse": mr.NOCOURSE_MODEL,
+}
+
+
+def load_models(paths=MODELS):
+    return {out_col: mr.get_model(path) for out_col, path in paths.items()}
+
+
+def score_chunk(chunk, models):
+    scores = pd.DataFrame(index=chunk.index)
+    for out_col, pipeline in models.items():
+        if len(chunk) == 0:
+            # a header-only input: no predict call (the imputer rejects 0 rows), same columns
+            scores[out_col] = np.empty(0)
+            continue
+        X = fs.frame_array(chunk, fs.model_features(pipeline))
+        scores[out_col] = mr.dropout_proba(pipeline, X)
+    if fs.TARGET_CSV in chunk.columns:
+        scores[fs.TARGET] = chunk[fs.TARGET_CSV]
+    return scores
+
+
+def score_file(input_path, output_path, models=None, chunksize=50_000, sep=";"):
+    if models is None:
+        models = load_models()
+
+    n_rows = 0
+    header = True
+    for chunk in pd.read_csv(input_path, sep=sep, chunksize=chunksize):
+        if len(chunk) == 0 and not header:
+            continue
+        scores = score_chunk(chunk, models)
+        scores.to_csv(output_path, mode="w" if header else "a", header=header, index_label="row")
+        header = False
+        n_rows += len(chunk)
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every student in a data.csv-shaped file.")
+    parser.add_argument("input", help="CSV file with the same columns as data.csv")
+    parser.add_argument("output", help="where to write the dropout probabilities (CSV)")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="rows per predict_proba call")
+    parser.add_argument("--sep", default=";", help="input CSV separator")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n_rows = score_file(args.input, args.output, chunksize=args.chunksize, sep=args.sep)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n_rows} rows in {elapsed:.2f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench_scaling.py
+# Throughput of the deployment (deploy.py) as the number of workers grows.
+#
+#   python bench_scaling.py --max-workers 4 --sessions 8
+#
+# For each worker count the Streamlit workers and the proxy of deploy.py are
+# started, and N concurrent sessions go through the proxy: the visitor script of
+# load_test.py (Home, EDA charts, both predictions, Explainability) over the
+# browser's websocket protocol. The routing is part of what is measured: the CPU
+# time of every worker shows how the sessions were spread. Workers attach to the
+# memory-mapped data cache and tree arrays published once by deploy.py, and the
+# report has how much of their resident memory is shared pages.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import deploy
+import load_test as lt
+
+BASE_PORT = 8701  # proxy port; the workers use the next ports
+
+
+def _memory(pid):
+    # (resident, shared) bytes of a process from /proc/<pid>/statm
+    with open(f"/proc/{pid}/statm") as f:
+        fields = f.read().split()
+    page = os.sysconf("SC_PAGE_SIZE")
+    return int(fields[1]) * page, int(fields[2]) * page
+
+
+def _cpu_seconds(pid):
+    # user + system CPU time of a process from /proc/<pid>/stat
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def start_proxy(ports, port):
+    # deploy.Proxy on an event loop in a thread of this process -> stop()
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        asyncio.start_server(deploy.Proxy(ports).handle, "127.0.0.1", port, limit=deploy.HEAD_LIMIT))
+    thread = threading.Thread(target=loop.run_forever, name="proxy", daemon=True)
+    thread.start()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+    return stop
+
+
+def run(n_workers, n_sessions, main_script, iterations, port=BASE_PORT):
+    workers = deploy.start_workers(n_workers, port, main_script, quiet=True)
+    stop_proxy = None
+    try:
+        ports = [worker_port for worker_port, _ in workers]
+        deploy.wait_healthy(ports)
+        stop_proxy = start_proxy(ports, port)
+        url = f"ws://127.0.0.1:{port}"
+        # warm-up: one session per worker (the proxy takes idle workers in turn)
+        for _ in range(n_workers):
+            lt.server_script(url, [])
+        cpu_before = [_cpu_seconds(process.pid) for _, process in workers]
+        result = lt.run_level(n_sessions, "server", main_script, iterations, url=url)
+        cpu = [_cpu_seconds(process.pid) - before for (_, process), before in zip(workers, cpu_before)]
+        memory = [_memory(process.pid) for _, process in workers]
+        peak = [lt.peak_rss(process.pid)[0] for _, process in workers]
+    finally:
+        if stop_proxy:
+            stop_proxy()
+        for _, process in workers:
+            process.terminate()
+        for _, process in workers:
+            process.wait()
+    result.update({
+        "workers": n_workers,
+        "worker_cpu_s": [round(seconds, 2) for seconds in cpu],
+        "worker_peak_rss_mb": sum(peak) / len(peak) / 2**20,
+        "worker_rss_mb": sum(m[0] for m in memory) / len(memory) / 2**20,
+        "worker_shared_mb": sum(m[1] for m in memory) / len(memory) / 2**20,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the throughput of deploy.py as the number of workers grows.")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions for every worker count")
+    parser.add_argument("--iterations", type=int, default=1, help="times every session runs the script")
+    parser.add_argument("--port", type=int, default=BASE_PORT, help="proxy port; the workers use the next ports")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    deploy.publish_shared_state()
+    print(f"{os.cpu_count()} CPU cores available, {args.sessions} concurrent sessions")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_scaling_") as directory:
+        main_script = deploy.stage_app(directory)
+        for n_workers in range(1, args.max_workers + 1):
+            result = run(n_workers, args.sessions, main_script, args.iterations, args.port)
+            result["speedup"] = result["throughput_rps"] / results[0]["throughput_rps"] if results else 1.0
+            results.append(result)
+            print(f"{n_workers} workers: {result['throughput_rps']:6.2f} reruns/s  speedup {result['speedup']:.2f}x  "
+                  f"p50 {result['p50_ms']:.0f} ms  p99 {result['p99_ms']:.0f} ms  "
+                  f"CPU s per worker {result['worker_cpu_s']}  "
+                  f"RSS {result['worker_rss_mb']:.0f} MB/worker ({result['worker_shared_mb']:.0f} MB shared)",
+                  flush=True)
+            for error in result["errors"][:5]:
+                print(f"      error: {error}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if any(result["errors"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# benchmarks.py
+# Offline benchmark suite: page reruns, inference, SHAP and EDA charts.
+#
+#   python benchmarks.py --output bench.json            # run and compare with the baseline
+#   python benchmarks.py --only predict shap.local      # name prefixes
+#   python benchmarks.py --save-baseline                # store this run as the new baseline
+#
+# Benchmarks:
+#   pages.<page>              one AppTest rerun of App.py and each page (after a first run)
+#   predict.<model>.<how>.<n> predict_proba on 1 and BATCH_ROWS rows, sklearn pipeline and
+#                             the compiled tree arrays the app scores with
+#   shap.global.<model>.<n>   compute_global_shap_sampled at SHAP_SAMPLE_SIZES (cache bypassed)
+#   shap.local.<model>        explain_row on a row that is not cached yet
+#   eda.<chart>.x<k>          EDA aggregates and figures on data.csv repeated k times
+#
+# Every benchmark reports the median and min of its repeats (slow ones repeat
+# less). Results are compared with BASELINE_PATH: a benchmark regresses when its
+# median is more than --tolerance slower than the baseline (and by at least
+# MIN_DELTA seconds), and the run then exits with status 1. Timings are only
+# comparable on the same machine, so refresh the baseline when the machine changes.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import correlation as cr
+import data_loader as dl
+import eda_aggregates as ea
+import eda_charts as ch
+import explainers as ex
+import features as fs
+import figure_cache as fc
+import import_profile as ip
+import model_registry as mr
+import tree_arrays as ta
+
+BASELINE_PATH = "benchmarks_baseline.json"
+MODELS = {"course": mr.COURSE_MODEL, "nocourse": mr.NOCOURSE_MODEL}
+BATCH_ROWS = 1000
+SHAP_SAMPLE_SIZES = (100, 300, 1000)
+EDA_SCALES = (1, 10, 100)
+PIE_COLUMN = "Gender"
+HIST_COLUMN = "Admission grade"
+SCATTER_PAIR = ("Admission grade", "Curricular units 1st sem (grade)")
+
+REPEAT = 5
+TOLERANCE = 0.25
+MIN_DELTA = 0.002  # seconds; smaller differences are timer noise on the micro benchmarks
+
+# a column name of data.csv ends in a tab, which matplotlib warns about on every draw
+warnings.filterwarnings("ignore", message="Glyph 9")
+# predict.*.sklearn times the pipelines on plain model-order arrays, as fitted on DataFrames
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def time_call(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def page_benchmarks():
+    from streamlit.testing.v1 import AppTest
+
+    # a prediction in session_state, so Explainability also renders its Local tab
+    pipeline = mr.get_model(mr.COURSE_MODEL)
+    X_row = fs.frame_array(dl.load_data(), fs.model_features(pipeline))[:1]
+    prediction = {
+        "last_model": "course",
+        "X_course": X_row,
+        "dropout_course": float(ta.dropout_proba(mr.COURSE_MODEL, X_row)[0]),
+        "student_name": "Benchmark",
+    }
+
+    for page in ip.PAGES:
+        at = AppTest.from_file(page, default_timeout=600)
+        if page.endswith("Explainability.py"):
+            for key, value in prediction.items():
+                at.session_state[key] = value
+        name = os.path.splitext(os.path.basename(page))[0]
+        # no rendered figures left by the benchmarks before, so "first" is a cold render
+        fc.clear()
+        yield f"pages.{name}", at.run, None
+
+
+def predict_benchmarks():
+    df = dl.load_data()
+    for model, path in MODELS.items():
+        pipeline = mr.get_model(path)
+        compiled = ta.get_compiled(path)
+        X = fs.frame_array(df, fs.model_features(pipeline))
+        for n_rows in (1, BATCH_ROWS):
+            rows = X[:n_rows]
+            yield f"predict.{model}.sklearn.{n_rows}", lambda p=pipeline, r=rows: p.predict_proba(r), None
+            if compiled is not None:
+                yield f"predict.{model}.arrays.{n_rows}", lambda c=compiled, r=rows: ta.predict_proba(c, r), None
+
+
+def shap_benchmarks():
+    df = dl.load_data()
+    for model, path in MODELS.items():
+        pipeline, version = mr.get_model(path), mr.model_version(path)
+        names = fs.model_features(pipeline)
+        X = fs.model_frame(df, names)
+        ex.get_explainer(pipeline, version)
+
+        for sample_size in SHAP_SAMPLE_SIZES:
+            def global_shap(pipeline=pipeline, version=version, X=X, sample_size=sample_size):
+                # the process cache is emptied first, so it never answers
+                ex.clear()
+                ex.compute_global_shap_sampled(pipeline, version, X, "benchmark", sample_size)
+
+            yield f"shap.global.{model}.{sample_size}", global_shap, 1 if sample_size >= 1000 else 3
+
+        rows = iter(fs.frame_array(df, names))
+        yield f"shap.local.{model}", lambda p=pipeline, v=version, r=rows: ex.explain_row(p, v, next(r)[None, :]), None
+
+
+def eda_benchmarks():
+    df = dl.load_data()
+    for scale in EDA_SCALES:
+        big = pd.concat([df] * scale, ignore_index=True) if scale > 1 else df
+        summary = ea.compute(big)
+        # new data versions every call (per scale), so the grid cache never answers
+        calls = iter(range(10**9))
+        x_col, y_col = SCATTER_PAIR
+
+        def scatter(big=big, scale=scale, calls=calls):
+            if len(big) > ea.SCATTER_MAX_POINTS:
+                grid = ea.scatter_grid(big, x_col, y_col, f"benchmark-x{scale}-{next(calls)}")
+                fig = ch.scatter_density(grid, x_col, y_col, "benchmark")
+            else:
+                fig = ch.scatter(big, x_col, y_col, "benchmark")
+            fc.figure_bytes(fig)
+
+        def corr(big=big, scale=scale):
+            # emptied first: a cached smaller scale would be taken for rows appended to it
+            cr.clear()
+            correlations = cr.get(big, f"benchmark-x{scale}")
+            fc.figure_bytes(ch.correlation_heatmap(correlations["pearson"]))
+
+        yield f"eda.summary.x{scale}", lambda big=big: ea.compute(big), None
+        yield f"eda.pie.x{scale}", lambda s=summary: fc.figure_bytes(ch.pie(s["contingency"][PIE_COLUMN], PIE_COLUMN)), None
+        yield f"eda.hist.x{scale}", lambda s=summary: fc.figure_bytes(ch.histogram(s["histograms"][HIST_COLUMN], HIST_COLUMN)), None
+        yield f"eda.scatter.x{scale}", scatter, None
+        # mutual information is the slow part: ~30 s for the 100x correlation matrix
+        yield f"eda.corr.x{scale}", corr, 1 if scale >= 100 else 3
+
+
+GROUPS = {
+    "pages": page_benchmarks,
+    "predict": predict_benchmarks,
+    "shap": shap_benchmarks,
+    "eda": eda_benchmarks,
+}
+
+
+def run(only=None, repeat=REPEAT):
+    results = {}
+    for group, benchmarks in GROUPS.items():
+        if only and not any(group.startswith(p) or p.startswith(group) for p in only):
+            continue
+        for name, fn, bench_repeat in benchmarks():
+            if only and not any(name.startswith(p) for p in only):
+                continue
+            first = time_call(fn, 1)[0]  # warm-up: imports, caches, first AppTest run
+            times = time_call(fn, min(repeat, bench_repeat or repeat))
+            results[name] = {
+                "median": statistics.median(times),
+                "min": min(times),
+                "first": first,
+                "repeat": len(times),
+            }
+            print(f"{name:<34} median {results[name]['median'] * 1000:10.2f} ms  "
+                  f"min {results[name]['min'] * 1000:10.2f} ms  first {first * 1000:10.2f} ms", flush=True)
+    return results
+
+
+def metadata():
+    import sklearn
+    import shap
+    import streamlit
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "pandas": pd.__version__, "sklearn": sklearn.__version__,
+                     "shap": shap.__version__, "streamlit": streamlit.__version__},
+        "models": {model: mr.model_version(path) for model, path in MODELS.items()},
+        "data_version": dl.load_versioned(dl.DATA_PATH)[0],
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta=MIN_DELTA):
+    # -> names of the benchmarks that got slower than the baseline allows
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34} new")
+            continue
+        delta = result["median"] - base["median"]
+        ratio = result["median"] / base["median"] if base["median"] else float("inf")
+        regressed = delta > max(min_delta, tolerance * base["median"])
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<34} {base['median'] * 1000:10.2f} -> {result['median'] * 1000:10.2f} ms  "
+              f"{ratio:5.2f}x {'REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite and compare it with a baseline.")
+    parser.add_argument("--only", nargs="+", help="benchmark name prefixes, e.g. pages predict.course eda.corr")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    args = parser.parse_args()
+
+    report = {"meta": metadata(), "benchmarks": run(args.only, args.repeat)}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        if args.only and os.path.exists(args.baseline):
+            # keep the baseline of the benchmarks that were not run
+            with open(args.baseline) as f:
+                stored = json.load(f)
+            report["benchmarks"] = dict(stored["benchmarks"], **report["benchmarks"])
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {args.baseline} ({baseline['meta']['created']}, {baseline['meta']['platform']})")
+    regressions = compare(report["benchmarks"], baseline["benchmarks"], args.tolerance)
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# correlation.py
+# Correlations for the EDA page, cached per data version.
+#
+# Pearson is computed from co-moment sums (count, means, centred cross-products)
+# accumulated over row chunks, so the frame is never copied as a whole. Only the
+# latest data version is kept. When a new version starts with exactly the rows of
+# the cached one (same hash of those rows, like train.history_sha1s for the file),
+# the rows appended after them are merged into the cached sums instead of a full
+# recompute.
+# Spearman and mutual information against the encoded Target are computed one
+# column per task on a thread pool. scipy and sklearn are imported on first use,
+# so loading the EDA page does not pay for them until the matrix is opened.
+
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+TARGET = "Target"
+TARGET_ENCODED = "target_encoded"
+CHUNK_ROWS = 100_000
+
+_lock = threading.Lock()
+_cache = {}  # data version -> result dict, latest version only
+
+
+def numeric_columns(df):
+    return df.select_dtypes(include="number").columns.tolist()
+
+
+def encode_target(target):
+    # Same codes as LabelEncoder: classes sorted alphabetically
+    classes, codes = np.unique(np.asarray(target).astype(str), return_inverse=True)
+    return classes, codes.astype(np.float64)
+
+
+def _block(df, columns, classes, start, stop):
+    part = df.iloc[start:stop]
+    X = np.empty((stop - start, len(columns) + 1))
+    for i, col in enumerate(columns):
+        X[:, i] = part[col].to_numpy(dtype=np.float64)
+    X[:, -1] = np.searchsorted(classes, part[TARGET].to_numpy().astype(str))
+    return X
+
+
+def comoments(X):
+    mean = X.mean(axis=0)
+    centred = X - mean
+    return {"n": len(X), "mean": mean, "C": centred.T @ centred}
+
+
+def merge(a, b):
+    # Chan et al. pairwise update of the co-moment sums
+    if a is None or a["n"] == 0:
+        return b
+    if b["n"] == 0:
+        return a
+    n = a["n"] + b["n"]
+    delta = b["mean"] - a["mean"]
+    return {
+        "n": n,
+        "mean": a["mean"] + delta * b["n"] / n,
+        "C": a["C"] + b["C"] + np.outer(delta, delta) * a["n"] * b["n"] / n,
+    }
+
+
+def accumulate(df, columns, classes, state=None, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        stop = min(start + chunk_rows, len(df))
+        state = merge(state, comoments(_block(df, columns, classes, start, stop)))
+    return state
+
+
+def pearson(state, labels):
+    std = np.sqrt(np.diag(state["C"]))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = state["C"] / np.outer(std, std)
+    return pd.DataFrame(corr, index=labels, columns=labels)
+
+
+def _spearman(values, target_ranks):
+    from scipy.stats import rankdata
+
+    ranks = rankdata(values)
+    with np.errstate(invalid="ignore"):
+        return np.corrcoef(ranks, target_ranks)[0, 1]
+
+
+def _mutual_info(values, codes):
+    from sklearn.feature_selection import mutual_info_classif
+
+    discrete = bool(np.all(values == np.round(values)))
+    return mutual_info_classif(values.reshape(-1, 1), codes, discrete_features=discrete, random_state=0)[0]
+
+
+def against_target(df, columns, codes, workers=None):
+    from scipy.stats import rankdata
+
+    target_ranks = rankdata(codes)
+
+    def one(col):
+        values = df[col].to_numpy(dtype=np.float64)
+        return _spearman(values, target_ranks), _mutual_info(values, codes)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(one, columns))
+    return pd.DataFrame(results, index=columns, columns=["spearman", "mutual_info"])
+
+
+def rows_sha1(df, columns, n_rows):
+    # sha1 of the values of the first n_rows rows, one column at a time
+    h = hashlib.sha1()
+    for col in columns + [TARGET]:
+        h.update(pd.util.hash_pandas_object(df[col].iloc[:n_rows], index=False).to_numpy())
+    return h.hexdigest()
+
+
+def _result(df, columns, classes, state):
+    labels = columns + [TARGET_ENCODED]
+    corr = pearson(state, labels)
+    _, codes = encode_target(df[TARGET])
+    target = against_target(df, columns, codes.astype(np.int64))
+    target.insert(0, "pearson", corr[TARGET_ENCODED].iloc[:-1])
+    return {"columns": columns, "classes": classes, "state": state, "pearson": corr, "target": target,
+            "n_rows": len(df), "sha1": rows_sha1(df, columns, len(df))}
+
+
+def append(df, old):
+    # The result for df from the result old of its first old["n_rows"] rows, or
+    # None when df is not old's rows plus appended ones. Pearson merges only the
+    # new rows into the cached co-moments; Spearman and mutual information depend
+    # on global ranks and are recomputed.
+    columns, n_old = old["columns"], old["n_rows"]
+    if len(df) <= n_old or numeric_columns(df) != columns or rows_sha1(df, columns, n_old) != old["sha1"]:
+        return None
+    new_rows = df.iloc[n_old:]
+    if set(np.unique(new_rows[TARGET].to_numpy().astype(str))) - set(old["classes"]):
+        return None
+    state = accumulate(new_rows, columns, old["classes"], state=old["state"])
+    return _result(df, columns, old["classes"], state)
+
+
+def get(df, data_version):
+    with _lock:
+        result = _cache.get(data_version)
+        previous = next(iter(_cache.values()), None)
+    if result is None:
+        result = append(df, previous) if previous is not None else None
+        if result is None:
+            columns = numeric_columns(df)
+            classes, _ = encode_target(df[TARGET])
+            result = _result(df, columns, classes, accumulate(df, columns, classes))
+        with _lock:
+            _cache.clear()
+            _cache[data_version] = result
+    return result
+
+
+def clear():
+    with _lock:
+        _cache.clear()
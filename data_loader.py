@@ -0,0 +1,156 @@
+# data_loader.py
+# One shared, process-wide loader for data.csv.
+#
+# The CSV is parsed once, converted to the compact dtypes of schema.py and
+# written to a columnar cache (one .npy file per column) under .cache/data/,
+# keyed on the file's sha1. Later starts memory-map those arrays instead of
+# parsing again; the mtime/size of the CSV is recorded so the hash is only
+# recomputed when the file actually changed.
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import schema as sc
+import timing as tm
+
+DATA_PATH = "data.csv"
+CACHE_DIR = os.path.join(".cache", "data")
+CACHE_FORMAT = 3  # bump when the on-disk layout or dtypes change
+
+_lock = threading.Lock()
+_loaded = {}  # abs path -> (mtime_ns, size, sha1, DataFrame)
+_views = {}  # (abs path, name) -> (sha1, derived DataFrame)
+
+
+def file_sha1(path, block_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _source_sha1(path, stat, cache_dir):
+    # Reuse the last hash if mtime and size did not change
+    index_path = os.path.join(cache_dir, f"{_stem(path)}.json")
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        if index["mtime_ns"] == stat.st_mtime_ns and index["size"] == stat.st_size:
+            return index["sha1"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha = file_sha1(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": sha}, f)
+    os.replace(tmp_path, index_path)
+    return sha
+
+
+def _write_columns(df, target_dir):
+    tmp_dir = f"{target_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        file_name = f"{i:03d}.npy"
+        entry = {"name": col, "file": file_name}
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            values = df[col].cat.codes.to_numpy()
+            entry["categories"] = [str(c) for c in df[col].cat.categories]
+        else:
+            values = df[col].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+        np.save(os.path.join(tmp_dir, file_name), values)
+        columns.append(entry)
+
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump({"rows": len(df), "columns": columns}, f)
+
+    try:
+        os.replace(tmp_dir, target_dir)
+    except OSError:
+        # another process published the same version first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_columns(target_dir):
+    with open(os.path.join(target_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    arrays = {}
+    for c in manifest["columns"]:
+        values = np.load(os.path.join(target_dir, c["file"]), mmap_mode="r")
+        if "categories" in c:
+            values = pd.Categorical.from_codes(values, categories=c["categories"])
+        arrays[c["name"]] = values
+    return pd.DataFrame(arrays, copy=False)
+
+
+def _load(path, stat, sep, cache_dir):
+    sha = _source_sha1(path, stat, cache_dir)
+    target_dir = os.path.join(cache_dir, f"{_stem(path)}-{sha[:16]}-v{CACHE_FORMAT}")
+    if not os.path.exists(os.path.join(target_dir, "manifest.json")):
+        with tm.span("data.csv_parse", path=_stem(path)):
+            _write_columns(sc.compact(pd.read_csv(path, sep=sep)), target_dir)
+    with tm.span("data.cache_load", path=_stem(path)):
+        return sha, _read_columns(target_dir)
+
+
+def load_versioned(path=DATA_PATH, sep=";", cache_dir=CACHE_DIR):
+    # -> (sha1 of the CSV, DataFrame parsed from exactly that file). Cache keys
+    # must come from the same pair as the frame, not from a second load.
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+
+    entry = _loaded.get(abs_path)
+    if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+        return entry[2], entry[3]
+
+    with _lock:
+        entry = _loaded.get(abs_path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2], entry[3]
+        sha, df = _load(abs_path, stat, sep, cache_dir)
+        _loaded[abs_path] = (stat.st_mtime_ns, stat.st_size, sha, df)
+        return sha, df
+
+
+def load_data(path=DATA_PATH, sep=";", cache_dir=CACHE_DIR):
+    return load_versioned(path, sep, cache_dir)[1]
+
+
+def view_versioned(name, build, path=DATA_PATH):
+    # -> (sha1, frame derived from the dataset with build(df)), built once per data
+    # version and shared by every session. Callers must treat it as read-only.
+    abs_path = os.path.abspath(path)
+    sha, df = load_versioned(path)
+    entry = _views.get((abs_path, name))
+    if entry and entry[0] == sha:
+        return entry
+    with _lock:
+        entry = _views.get((abs_path, name))
+        if entry and entry[0] == sha:
+            return entry
+        entry = _views[(abs_path, name)] = (sha, build(df))
+        return entry
+
+
+def is_shared(obj):
+    # True for the process-wide dataset and its views (not owned by a session)
+    return any(obj is entry[3] for entry in _loaded.values()) or \
+        any(obj is entry[1] for entry in _views.values())
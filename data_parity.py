@@ -0,0 +1,56 @@
+# data_parity.py
+# Checks that the model inputs built from the cached dataset (data_loader) are
+# exactly the inputs built from the raw CSV.
+#
+#   python data_parity.py
+#
+# The columnar cache stores compact dtypes (schema.compact); this catches any
+# dtype change that rounds a model feature, which would make the pages that read
+# the cache (Explainability, prewarm, precompute_shap, benchmarks) disagree with
+# the Predictor and batch_scoring, which score float64 rows. For both models it
+# compares fs.frame_array() element by element and the predicted probabilities.
+# Exits with status 1 on any difference.
+
+import argparse
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import data_loader as dl
+import features as fs
+import model_registry as mr
+
+MODEL_PATHS = (mr.COURSE_MODEL, mr.NOCOURSE_MODEL)
+
+# the pipelines were fitted on DataFrames and are compared here on plain model-order arrays
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def check(model_path, cached, raw):
+    pipeline = mr.get_model(model_path)
+    names = fs.model_features(pipeline)
+    X_cached, X_raw = fs.frame_array(cached, names), fs.frame_array(raw, names)
+
+    same = X_cached.dtype == X_raw.dtype and np.array_equal(X_cached, X_raw, equal_nan=True)
+    if not same:
+        cols = [names[i] for i in np.flatnonzero((X_cached != X_raw).any(axis=0))]
+        print(f"{model_path}: inputs differ ({X_cached.dtype} vs {X_raw.dtype}) in {', '.join(cols) or 'dtype only'}")
+    diff = np.abs(pipeline.predict_proba(X_cached) - pipeline.predict_proba(X_raw)).max()
+    ok = same and diff == 0
+    print(f"{model_path}: {len(X_raw)} rows, max |proba diff| = {diff:.2e} {'ok' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model inputs from the data cache with the raw CSV.")
+    parser.add_argument("--data", default=dl.DATA_PATH)
+    args = parser.parse_args()
+    cached, raw = dl.load_data(args.data), pd.read_csv(args.data, sep=";")
+    ok = all([check(path, cached, raw) for path in MODEL_PATHS])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
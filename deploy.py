@@ -0,0 +1,212 @@
+# deploy.py
+# Multi-process deployment: N Streamlit workers behind a local reverse proxy.
+#
+#   python deploy.py --workers 4 --port 8501
+#
+# Before any worker starts, the shared state is published once to memory-mapped
+# files: the columnar data cache (data_loader) and the tree arrays of both models
+# (tree_arrays). Workers attach to those files read-only, so the OS keeps one
+# physical copy for all of them.
+#
+# Each worker is a plain `streamlit run App.py` on its own port. Streamlit only
+# looks for a lowercase pages/ directory next to the main script, which Pages/ is
+# not on a case-sensitive file system, so the workers run a staged copy of App.py
+# with a pages/ link to Pages/ (stage_app), from the repository root.
+#
+# The proxy pins a browser to one worker with a cookie (Streamlit keeps the
+# session and its media files in the worker that served the websocket). A
+# connection without the cookie goes to the worker with the fewest open
+# connections (ties in turn), and its first response sets the cookie. The websocket is opened
+# by the page's script, after the page response has set the cookie, so the session
+# and its media requests stay on one worker. After that the proxy just forwards
+# bytes, so HTTP and websocket traffic go through the same code path.
+
+import argparse
+import asyncio
+import itertools
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import data_loader as dl
+import model_registry as mr
+import tree_arrays as ta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+COOKIE = "av_worker"
+HEAD_LIMIT = 64 * 1024
+
+
+def publish_shared_state(data_path=dl.DATA_PATH):
+    # Everything the workers memory-map, written before they start
+    start = time.perf_counter()
+    dl.load_data(data_path)
+    compiled = [path for path in (mr.COURSE_MODEL, mr.NOCOURSE_MODEL) if ta.get_compiled(path) is not None]
+    print(f"Published data cache and tree arrays ({', '.join(compiled) or 'no compilable model'}) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+def stage_app(directory):
+    # -> path of the main script to `streamlit run`, with cwd=ROOT and app_env()
+    shutil.copy(os.path.join(ROOT, "App.py"), os.path.join(directory, "App.py"))
+    os.symlink(os.path.join(ROOT, "Pages"), os.path.join(directory, "pages"))
+    return os.path.join(directory, "App.py")
+
+
+def app_env():
+    # the staged scripts import the helper modules from the repository
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+
+
+def start_workers(n_workers, base_port, main_script, address="127.0.0.1", quiet=False):
+    workers = []
+    for i in range(n_workers):
+        port = base_port + 1 + i
+        cmd = [
+            sys.executable, "-m", "streamlit", "run", main_script,
+            "--server.port", str(port),
+            "--server.address", address,
+            "--server.headless", "true",
+        ]
+        output = subprocess.DEVNULL if quiet else None
+        workers.append((port, subprocess.Popen(cmd, cwd=ROOT, env=app_env(), stdout=output, stderr=output)))
+    return workers
+
+
+def wait_healthy(ports, timeout=60):
+    deadline = time.monotonic() + timeout
+    for port in ports:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as r:
+                    if r.status == 200:
+                        break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Worker on port {port} did not become healthy")
+            time.sleep(0.5)
+
+
+def _worker_from_cookie(head, n_workers):
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() != b"cookie":
+            continue
+        for part in value.split(b";"):
+            key, _, val = part.strip().partition(b"=")
+            if key == COOKIE.encode() and val.isdigit() and int(val) < n_workers:
+                return int(val)
+    return None
+
+
+async def _pipe(reader, writer):
+    try:
+        while data := await reader.read(1 << 16):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+class Proxy:
+    def __init__(self, ports):
+        self.ports = ports
+        self.connections = [0] * len(ports)  # open connections per worker
+        self.turn = itertools.count()
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            head = await client_reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+
+        worker = _worker_from_cookie(head, len(self.ports))
+        new_client = worker is None
+        if new_client:
+            n, start = len(self.ports), next(self.turn)
+            worker = min(((start + i) % n for i in range(n)), key=self.connections.__getitem__)
+
+        self.connections[worker] += 1
+        try:
+            await self._forward(head, worker, new_client, client_reader, client_writer)
+        finally:
+            self.connections[worker] -= 1
+
+    async def _forward(self, head, worker, new_client, client_reader, client_writer):
+        try:
+            backend_reader, backend_writer = await asyncio.open_connection("127.0.0.1", self.ports[worker])
+        except OSError:
+            client_writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await client_writer.drain()
+            client_writer.close()
+            return
+
+        backend_writer.write(head)
+        await backend_writer.drain()
+        upstream = asyncio.create_task(_pipe(client_reader, backend_writer))
+
+        if new_client:
+            # pin the browser to this worker on the first response of the connection
+            try:
+                response_head = await backend_reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                upstream.cancel()
+                client_writer.close()
+                return
+            cookie = f"Set-Cookie: {COOKIE}={worker}; Path=/; HttpOnly; SameSite=Lax\r\n".encode()
+            client_writer.write(response_head[:-2] + cookie + b"\r\n")
+            await client_writer.drain()
+
+        await _pipe(backend_reader, client_writer)
+        upstream.cancel()
+
+
+async def serve_proxy(ports, port, address="127.0.0.1"):
+    proxy = Proxy(ports)
+    server = await asyncio.start_server(proxy.handle, address, port, limit=HEAD_LIMIT)
+    print(f"Proxy on http://{address}:{port} -> workers {ports}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several Streamlit workers behind a local reverse proxy.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8501, help="proxy port; workers use the next ports")
+    parser.add_argument("--address", default="127.0.0.1", help="proxy bind address")
+    args = parser.parse_args()
+
+    publish_shared_state()
+    staging = tempfile.mkdtemp(prefix="deploy_")
+    workers = start_workers(args.workers, args.port, stage_app(staging))
+    ports = [port for port, _ in workers]
+
+    def stop(*_):
+        for _, process in workers:
+            process.terminate()
+        for _, process in workers:
+            process.wait()
+        shutil.rmtree(staging, ignore_errors=True)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        wait_healthy(ports)
+        asyncio.run(serve_proxy(ports, args.port, args.address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
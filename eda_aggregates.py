@@ -0,0 +1,171 @@
+# eda_aggregates.py
+# Small summaries behind every EDA chart, computed in one go per data version.
+#
+# The page renders KPIs, pie charts and histograms (with their KDE curves, see
+# density.py) from these summaries only, so its cost no longer depends on the
+# number of rows.
+
+import threading
+
+import numpy as np
+
+import density
+
+TARGET = "Target"
+DROPOUT = "Dropout"
+GROUPS = ("Dropout", "No Dropout")
+
+CATEGORICAL_COLS = [
+    'Gender', 'Marital status', 'Displaced', 'Scholarship holder',
+    'Tuition fees up to date', 'Educational special needs', 'Daytime/evening attendance\t'
+]
+
+KPI_COLUMNS = [
+    'Admission grade',
+    'Previous qualification (grade)',
+    'Age at enrollment',
+    'Curricular units 1st sem (grade)',
+    'Curricular units 1st sem (enrolled)',
+    'Curricular units 1st sem (evaluations)',
+    'Curricular units 2nd sem (grade)',
+    'Curricular units 2nd sem (enrolled)',
+    'Curricular units 2nd sem (evaluations)',
+    'Inflation rate',
+    'GDP'
+]
+
+MEAN_COLUMNS = [
+    "Previous qualification (grade)",
+    "Admission grade",
+    "Curricular units 1st sem (grade)",
+    "Curricular units 2nd sem (grade)",
+    "Curricular units 1st sem (enrolled)",
+    "Curricular units 2nd sem (enrolled)",
+]
+
+HIST_BINS = 40
+MAX_INTEGER_BINS = 60
+
+# Above this many rows the scatter plots are drawn as binned 2D density grids
+SCATTER_MAX_POINTS = 20_000
+SCATTER_BINS = 200
+
+_lock = threading.Lock()
+_cache = {}  # data version -> summaries
+_grids = {}  # (data version, x column, y column, bins) -> 2D grid per group
+
+
+def dropout_mask(df):
+    return df[TARGET].to_numpy() == DROPOUT
+
+
+def _approved_pct(enrolled, approved):
+    # share of students with at least one enrolled unit that passed all of them
+    no_enrolled = np.count_nonzero(enrolled == 0)
+    all_passed = np.count_nonzero(enrolled == approved) - no_enrolled
+    return all_passed / (len(enrolled) - no_enrolled) * 100
+
+
+def _bin_edges(values):
+    values = values[~np.isnan(values)]
+    lo, hi = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+    is_integer = np.all(values == np.round(values))
+    if is_integer and hi - lo <= MAX_INTEGER_BINS:
+        return np.arange(lo - 0.5, hi + 1.5)
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, HIST_BINS + 1)
+
+
+def _contingency(values, drop):
+    # category -> count for each group, categories sorted by code
+    categories, inverse = np.unique(values, return_inverse=True)
+    n = len(categories)
+    counts_drop = np.bincount(inverse[drop], minlength=n)
+    counts_no_drop = np.bincount(inverse[~drop], minlength=n)
+    return {"categories": categories, "Dropout": counts_drop, "No Dropout": counts_no_drop}
+
+
+def _histogram(values, drop):
+    # fixed-bin counts plus a binned-FFT KDE curve (grid, density) per group
+    edges = _bin_edges(values)
+    return {
+        "edges": edges,
+        "Dropout": np.histogram(values[drop], bins=edges)[0],
+        "No Dropout": np.histogram(values[~drop], bins=edges)[0],
+        "kde": {"Dropout": density.kde(values[drop]), "No Dropout": density.kde(values[~drop])},
+    }
+
+
+def compute(df):
+    n_rows = len(df)
+    target = df[TARGET].to_numpy()
+    labels, target_counts = np.unique(target.astype(str), return_counts=True)
+    drop = target == DROPOUT
+
+    columns = {}
+
+    def col(name):
+        if name not in columns:
+            columns[name] = df[name].to_numpy(dtype=np.float64)
+        return columns[name]
+
+    kpis = {
+        "target_pct": {str(label): float(count / n_rows * 100) for label, count in zip(labels, target_counts)},
+        "means": {name: float(np.nanmean(col(name))) for name in MEAN_COLUMNS},
+        "approved_1": _approved_pct(col("Curricular units 1st sem (enrolled)"), col("Curricular units 1st sem (approved)")),
+        "approved_2": _approved_pct(col("Curricular units 2nd sem (enrolled)"), col("Curricular units 2nd sem (approved)")),
+    }
+
+    return {
+        "n_rows": n_rows,
+        "group_sizes": {"Dropout": int(drop.sum()), "No Dropout": int((~drop).sum())},
+        "kpis": kpis,
+        "contingency": {name: _contingency(df[name].to_numpy(), drop) for name in CATEGORICAL_COLS if name in df.columns},
+        "histograms": {name: _histogram(col(name), drop) for name in KPI_COLUMNS if name in df.columns},
+    }
+
+
+def get(df, data_version):
+    summaries = _cache.get(data_version)
+    if summaries is None:
+        summaries = compute(df)
+        with _lock:
+            _cache.clear()
+            _cache[data_version] = summaries
+    return summaries
+
+
+def value_counts(table, group):
+    # (categories, counts) of one group like Series.value_counts(): non-zero, most frequent first
+    counts = table[group]
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    return table["categories"][order], counts[order]
+
+
+def scatter_grid(df, x_col, y_col, data_version, bins=SCATTER_BINS):
+    # Counts of (x, y) on a shared bins x bins grid, per group
+    key = (data_version, x_col, y_col, bins)
+    grid = _grids.get(key)
+    if grid is not None:
+        return grid
+
+    x = df[x_col].to_numpy(dtype=np.float64)
+    y = df[y_col].to_numpy(dtype=np.float64)
+    ok = ~(np.isnan(x) | np.isnan(y))
+    drop = dropout_mask(df)
+    x_range = (x[ok].min(), x[ok].max()) if ok.any() else (0.0, 1.0)
+    y_range = (y[ok].min(), y[ok].max()) if ok.any() else (0.0, 1.0)
+    hist_range = [x_range, y_range]
+
+    grid = {"extent": (x_range[0], x_range[1], y_range[0], y_range[1])}
+    for group, mask in zip(GROUPS, (drop, ~drop)):
+        mask = mask & ok
+        grid[group] = np.histogram2d(x[mask], y[mask], bins=bins, range=hist_range)[0]
+
+    with _lock:
+        if len(_grids) > 64:
+            _grids.clear()
+        _grids[key] = grid
+    return grid
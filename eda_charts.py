@@ -0,0 +1,142 @@
+# eda_charts.py
+# Figures of the EDA page, built from the eda_aggregates / correlation summaries.
+#
+# Each function returns a matplotlib Figure for figure_cache.render(); the page
+# only calls them on a cache miss. matplotlib and seaborn are imported inside the
+# functions, so importing this module (and loading the page) does not pay for them.
+# benchmarks.py draws the same figures on enlarged copies of the data.
+
+import numpy as np
+
+import eda_aggregates as ea
+
+COLOR_DROP = "#FF6666"
+COLOR_NO_DROP = "#4CAF50"
+
+
+def pie(table, column, labels_map=None):
+    # table: eda_aggregates contingency of one categorical column
+    import matplotlib.pyplot as plt
+
+    color_palette = plt.cm.Set2.colors
+    index_drop, counts_drop = ea.value_counts(table, "Dropout")
+    index_no_drop, counts_no_drop = ea.value_counts(table, "No Dropout")
+
+    labels_map = labels_map or {}
+    labels_drop = [labels_map.get(c, c) for c in index_drop.tolist()]
+    labels_no_drop = [labels_map.get(c, c) for c in index_no_drop.tolist()]
+
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    axes[0].pie(
+        counts_drop,
+        labels=labels_drop,
+        autopct='%1.1f%%',
+        startangle=140,
+        pctdistance=0.85,
+        colors=color_palette[:len(counts_drop)]
+    )
+    axes[0].set_title(f'{column} — Dropout')
+
+    axes[1].pie(
+        counts_no_drop,
+        labels=labels_no_drop,
+        autopct='%1.1f%%',
+        startangle=140,
+        pctdistance=0.85,
+        colors=color_palette[:len(counts_no_drop)]
+    )
+    axes[1].set_title(f'{column} — No Dropout')
+
+    plt.suptitle(f'Distribution of {column}', fontsize=14)
+    return fig
+
+
+def histogram(hist, column):
+    # hist: eda_aggregates histogram (edges, counts and KDE per group) of one column
+    import matplotlib.pyplot as plt
+
+    palette = plt.cm.Set2.colors  # same colours as sns.color_palette("Set2", 2)
+    color_map = {"Dropout": palette[0], "No Dropout": palette[1]}
+    fig, axes = plt.subplots(1, 2, figsize=(12, 4), sharey=True)
+
+    edges = hist["edges"]
+    widths = np.diff(edges)
+
+    for ax, group in zip(axes, ea.GROUPS):
+        counts = hist[group]
+        heights = counts / max(counts.sum(), 1) / widths  # stat="density"
+        ax.bar(edges[:-1], heights, width=widths, align="edge",
+               color=color_map[group], alpha=0.7, edgecolor="black", linewidth=0.5)
+        grid, dens = hist["kde"][group]
+        ax.plot(grid, dens, color=color_map[group], linewidth=1.5)
+        ax.set_title(f'{column} — {group}')
+        ax.set_xlabel(column)
+        ax.set_ylabel('Density')
+
+    plt.suptitle(f'Distribution of {column} (Dropout vs No Dropout)', fontsize=14)
+    plt.tight_layout()
+    return fig
+
+
+def scatter(df, x_col, y_col, label):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5), sharex=True, sharey=True)
+
+    drop = ea.dropout_mask(df)
+    x, y = df[x_col].to_numpy(), df[y_col].to_numpy()
+
+    # Dropout Scatter
+    axes[0].scatter(x[drop], y[drop], alpha=0.7, color=COLOR_DROP, edgecolor='black')
+    axes[0].set_title("Dropout")
+    axes[0].set_xlabel(x_col)
+    axes[0].set_ylabel(y_col)
+
+    # No Dropout Scatter
+    axes[1].scatter(x[~drop], y[~drop], alpha=0.7, color=COLOR_NO_DROP, edgecolor='black')
+    axes[1].set_title("No Dropout")
+    axes[1].set_xlabel(x_col)
+    axes[1].set_ylabel(y_col)
+
+    plt.suptitle(label, fontsize=14)
+    plt.tight_layout()
+    return fig
+
+
+def scatter_density(grid, x_col, y_col, label):
+    # grid: eda_aggregates.scatter_grid counts, used above ea.SCATTER_MAX_POINTS rows
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap, LogNorm, to_rgba
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5), sharex=True, sharey=True)
+
+    for ax, group, color in zip(axes, ea.GROUPS, (COLOR_DROP, COLOR_NO_DROP)):
+        cmap = LinearSegmentedColormap.from_list(group, [to_rgba(color, 0.3), color, "#1a1a1a"])
+        counts = np.ma.masked_equal(grid[group].T, 0)
+        image = ax.imshow(counts, origin="lower", extent=grid["extent"], aspect="auto",
+                          cmap=cmap, norm=LogNorm(vmin=1), interpolation="nearest")
+        fig.colorbar(image, ax=ax, label="Students")
+        ax.set_title(group)
+        ax.set_xlabel(x_col)
+        ax.set_ylabel(y_col)
+
+    plt.suptitle(label, fontsize=14)
+    plt.tight_layout()
+    return fig
+
+
+def correlation_heatmap(corr_matrix):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Create heatmap
+    fig, ax = plt.subplots(figsize=(20, 18))
+    sns.heatmap(
+        corr_matrix,
+        cmap='coolwarm',
+        annot=False,
+        linewidths=.5,
+        ax=ax
+    )
+    ax.set_title("Correlation Matrix of Numerical Features & Encoded Target", fontsize=16)
+    return fig
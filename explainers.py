@@ -0,0 +1,148 @@
+# explainers.py
+# Process-wide SHAP helpers for the (imputer -> scaler -> model) pipelines.
+#
+# One TreeExplainer per model version, and a bounded LRU of local explanations
+# keyed by (model version, hash of the input row), so re-opening the Local tab
+# for a student that was already explained does no SHAP work at all. Sampled
+# global SHAP values are kept in a small LRU keyed by (model version, data
+# version, sample size), so stale versions fall out.
+# Full-population SHAP matrices are written offline by precompute_shap.py and
+# memory-mapped from .cache/shap/.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import features as fs
+import timing as tm
+
+MAX_EXPLAINERS = 4
+LOCAL_CACHE_SIZE = 256
+GLOBAL_CACHE_SIZE = 8
+SHAP_DIR = os.path.join(".cache", "shap")
+SHAP_FORMAT = 2  # bump when the inputs behind stored values change (2: float64 model features)
+
+_lock = threading.Lock()
+_explainers = OrderedDict()  # model version -> TreeExplainer
+_local = OrderedDict()  # (model version, row hash) -> (shap values, base value)
+_global = OrderedDict()  # (model version, data version, sample size) -> (shap values, X sample)
+
+
+def transform(pipeline, X):
+    imp = pipeline.named_steps["imputer"]
+    scl = pipeline.named_steps["scaler"]
+    return scl.transform(imp.transform(fs.array_frame(X, fs.model_features(pipeline))))
+
+
+def get_explainer(pipeline, version):
+    with _lock:
+        explainer = _explainers.get(version)
+        if explainer is not None:
+            _explainers.move_to_end(version)
+            return explainer
+
+    with tm.span("shap.explainer_build"):
+        import shap  # deferred: importing shap takes seconds and most pages never need it
+
+        explainer = shap.TreeExplainer(pipeline.named_steps["model"])
+    with _lock:
+        _explainers[version] = explainer
+        while len(_explainers) > MAX_EXPLAINERS:
+            _explainers.popitem(last=False)
+    return explainer
+
+
+def positive_class(shap_values):
+    # SHAP values for class 1 whatever shape the explainer returned
+    if isinstance(shap_values, list):
+        return np.asarray(shap_values[1])
+    arr = np.asarray(shap_values)
+    if arr.ndim == 3:
+        return arr[:, :, 1]
+    return arr
+
+
+def positive_base_value(expected_value):
+    expected_value = np.atleast_1d(expected_value)
+    return expected_value[1] if len(expected_value) > 1 else expected_value[0]
+
+
+def row_key(version, x_row):
+    row = np.ascontiguousarray(x_row, dtype=np.float64)
+    return version, hashlib.sha1(row.tobytes()).hexdigest()
+
+
+def explain_row(pipeline, version, x_row):
+    # x_row: (1, n_features) array in model order -> (shap values, base value)
+    key = row_key(version, x_row)
+    with _lock:
+        cached = _local.get(key)
+        if cached is not None:
+            _local.move_to_end(key)
+            return cached
+
+    explainer = get_explainer(pipeline, version)
+    with tm.span("shap.local"):
+        shap_values = explainer.shap_values(transform(pipeline, x_row))
+    result = (positive_class(shap_values)[0], positive_base_value(explainer.expected_value))
+
+    with _lock:
+        _local[key] = result
+        while len(_local) > LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+    return result
+
+
+def compute_global_shap_sampled(pipeline, version, X, data_version, sample_size=300):
+    # X: features DataFrame in model order; cached per process for the model/data version
+    key = (version, data_version, sample_size)
+    with _lock:
+        cached = _global.get(key)
+        if cached is not None:
+            _global.move_to_end(key)
+            return cached
+
+    if len(X) > sample_size:
+        X_sample = X.sample(sample_size, random_state=42)
+    else:
+        X_sample = X
+
+    explainer = get_explainer(pipeline, version)
+    with tm.span("shap.global_sampled", rows=len(X_sample)):
+        shap_values = explainer.shap_values(transform(pipeline, X_sample), check_additivity=False)
+    result = (positive_class(shap_values), X_sample)
+    with _lock:
+        _global[key] = result
+        while len(_global) > GLOBAL_CACHE_SIZE:
+            _global.popitem(last=False)
+    return result
+
+
+def clear():
+    # Forget the cached local and sampled global explanations (the explainers stay built)
+    with _lock:
+        _local.clear()
+        _global.clear()
+
+
+def global_shap_path(model_path, model_version, data_version, shap_dir=SHAP_DIR):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(shap_dir, f"{stem}-{model_version[:16]}-{data_version[:16]}-v{SHAP_FORMAT}.npy")
+
+
+def load_global_shap(model_path, model_version, data_version, shap_dir=SHAP_DIR):
+    # (n_rows, n_features) class-1 SHAP matrix for the whole dataset, or None
+    path = global_shap_path(model_path, model_version, data_version, shap_dir)
+    if not os.path.exists(path):
+        return None
+    return np.load(path, mmap_mode="r")
+
+
+def sample_rows(n_rows, sample_size, seed=42):
+    # Same seed -> smaller samples are subsets of bigger ones
+    if sample_size >= n_rows:
+        return np.arange(n_rows)
+    return np.sort(np.random.default_rng(seed).permutation(n_rows)[:sample_size])
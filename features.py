@@ -0,0 +1,121 @@
+# features.py
+# Single feature schema shared by the Predictor widgets, data.csv and the models.
+#
+# Every model input is built here as a contiguous float64 array in the model's
+# feature order (pipeline.feature_names_in_), for one row or for N rows.
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+# feature name -> (CSV header, Predictor widget key "with course", widget key "without course")
+SCHEMA = {
+    "marital": ("Marital status", "marital", "marital_nc"),
+    "app_mode": ("Application mode", "app_mode", "app_mode_nc"),
+    "app_order": ("Application order", "app_order", "app_order_nc"),
+    "course": ("Course", "course", "course_nc"),
+    "attendance": ("Daytime/evening attendance\t", "attendance", "attendance_nc"),
+    "prev_qual": ("Previous qualification", "prev_qual", "prev_qual_nc"),
+    "prev_grade": ("Previous qualification (grade)", "prev_grade", "prev_grade_nc"),
+    "nationality": ("Nacionality", "nationality", "nationality_nc"),
+    "mother_qual": ("Mother's qualification", "mother_qual", "mother_qual_nc"),
+    "father_qual": ("Father's qualification", "father_qual", "father_qual_nc"),
+    "mother_job": ("Mother's occupation", "mother_job", "mother_job_nc"),
+    "father_job": ("Father's occupation", "father_job", "father_job_nc"),
+    "admission_grade": ("Admission grade", "admission_grade", "admission_grade_nc"),
+    "displaced": ("Displaced", "displaced", "displaced_nc"),
+    "special_needs": ("Educational special needs", "special_needs", "special_nc"),
+    "debtor": ("Debtor", "debtor", "debtor_nc"),
+    "fees": ("Tuition fees up to date", "fees", "fees_nc"),
+    "gender": ("Gender", "gender", "gender_nc"),
+    "scholarship": ("Scholarship holder", "scholarship", "scholarship_nc"),
+    "age": ("Age at enrollment", "age", "age_nc"),
+    "international": ("International", "international", "international_nc"),
+    "cred_1": ("Curricular units 1st sem (credited)", "cred_1_c", None),
+    "enrolled_1": ("Curricular units 1st sem (enrolled)", "enrolled_1_c", None),
+    "evals_1": ("Curricular units 1st sem (evaluations)", "evals_1_c", None),
+    "approved_1": ("Curricular units 1st sem (approved)", "approved_1_c", None),
+    "grade_1": ("Curricular units 1st sem (grade)", "grade_1_c", None),
+    "no_evals_1": ("Curricular units 1st sem (without evaluations)", "no_evals_1_c", None),
+    "cred_2": ("Curricular units 2nd sem (credited)", "cred_2_c", None),
+    "enrolled_2": ("Curricular units 2nd sem (enrolled)", "enrolled_2_c", None),
+    "evals_2": ("Curricular units 2nd sem (evaluations)", "evals_2_c", None),
+    "approved_2": ("Curricular units 2nd sem (approved)", "approved_2_c", None),
+    "grade_2": ("Curricular units 2nd sem (grade)", "grade_2_c", None),
+    "no_evals_2": ("Curricular units 2nd sem (without evaluations)", "no_evals_2_c", None),
+    "unemployment": ("Unemployment rate", "unemployment_c", "unemployment_nc"),
+    "inflation": ("Inflation rate", "inflation_c", "inflation_nc"),
+    "gdp": ("GDP", "gdp_c", "gdp_nc"),
+}
+
+TARGET_CSV = "Target"
+TARGET = "target"
+
+# inputs of the two pipelines: "without course" drops the curricular-unit features
+MODEL_FEATURES = {
+    "course": tuple(SCHEMA),
+    "nocourse": tuple(name for name, (_, _, key) in SCHEMA.items() if key is not None),
+}
+
+FEATURE_NAMES = tuple(SCHEMA)
+FEATURE_TO_CSV = {name: csv for name, (csv, _, _) in SCHEMA.items()}
+CSV_TO_FEATURE = {csv: name for name, csv in FEATURE_TO_CSV.items()} | {TARGET_CSV: TARGET}
+WIDGET_TO_FEATURE = {
+    "course": {key: name for name, (_, key, _) in SCHEMA.items()},
+    "nocourse": {key: name for name, (_, _, key) in SCHEMA.items() if key is not None},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _positions(names):
+    return {name: i for i, name in enumerate(names)}
+
+
+def model_features(pipeline):
+    return tuple(pipeline.feature_names_in_)
+
+
+def row_array(values, names):
+    # values: feature name -> value (missing / ignored features become NaN)
+    names = tuple(names)
+    row = np.full((1, len(names)), np.nan)
+    for name, i in _positions(names).items():
+        value = values.get(name)
+        if value is not None:
+            row[0, i] = value
+    return row
+
+
+def widget_row(widget_values, tab, names):
+    # widget_values: Predictor widget key -> value, tab: "course" or "nocourse"
+    lookup = WIDGET_TO_FEATURE[tab]
+    values = {lookup[key]: value for key, value in widget_values.items() if key in lookup}
+    return row_array(values, names)
+
+
+def frame_array(df, names):
+    # N-row array from a DataFrame with either CSV headers or short feature names
+    names = tuple(names)
+    out = np.empty((len(df), len(names)), dtype=np.float64)
+    for i, name in enumerate(names):
+        col = name if name in df.columns else FEATURE_TO_CSV.get(name)
+        if col not in df.columns:
+            raise KeyError(f"Input is missing the '{name}' feature")
+        out[:, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    return out
+
+
+def array_frame(X, names):
+    # DataFrame over a model-order array (no copy), with the feature names the
+    # pipelines were fitted on, so sklearn's feature-name check passes
+    return X if isinstance(X, pd.DataFrame) else pd.DataFrame(X, columns=list(names), copy=False)
+
+
+def rename_to_features(df):
+    return df.rename(columns=CSV_TO_FEATURE)
+
+
+def model_frame(df, names):
+    # Features DataFrame (short names, model order) from a data.csv-shaped frame
+    return rename_to_features(df)[list(names)]
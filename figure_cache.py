@@ -0,0 +1,78 @@
+# figure_cache.py
+# Process-wide cache of rendered matplotlib figures (PNG/SVG bytes), shared by
+# all pages and sessions.
+#
+# Keys are tuples like ("hist", column, data_version); entries are evicted in
+# LRU order once the cached bytes exceed MAX_BYTES. A plot that was already
+# rendered comes back as bytes without touching (or importing) matplotlib.
+
+import io
+import threading
+from collections import OrderedDict
+
+import timing as tm
+
+MAX_BYTES = 64 * 1024 * 1024
+
+# same defaults st.pyplot uses
+SAVEFIG_KWARGS = {"bbox_inches": "tight", "dpi": 200}
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # key -> bytes
+_total_bytes = 0
+
+
+def get(key):
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+        return data
+
+
+def put(key, data, max_bytes=None):
+    global _total_bytes
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        old = _cache.pop(key, None)
+        if old is not None:
+            _total_bytes -= len(old)
+        if len(data) > max_bytes:
+            return
+        _cache[key] = data
+        _total_bytes += len(data)
+        while _total_bytes > max_bytes:
+            _, evicted = _cache.popitem(last=False)
+            _total_bytes -= len(evicted)
+
+
+def figure_bytes(fig, fmt="png"):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, **SAVEFIG_KWARGS)
+    import matplotlib.pyplot as plt  # already loaded by whoever drew fig
+
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def render(key, draw, fmt="png"):
+    # draw() must build and return a matplotlib Figure; it only runs on a cache miss
+    key = (fmt,) + tuple(key)
+    data = get(key)
+    if data is None:
+        with tm.span("figure.render", chart=key[1]):
+            data = figure_bytes(draw(), fmt)
+        put(key, data)
+    return data
+
+
+def stats():
+    with _lock:
+        return {"entries": len(_cache), "bytes": _total_bytes, "max_bytes": MAX_BYTES}
+
+
+def clear():
+    global _total_bytes
+    with _lock:
+        _cache.clear()
+        _total_bytes = 0
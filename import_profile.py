@@ -0,0 +1,114 @@
+# import_profile.py
+# Cold-load profile of every page, with a time budget per page.
+#
+#   python import_profile.py                      # profile + check against BUDGETS
+#   python import_profile.py --scale 1.5 --top 10 --output imports.json
+#
+# Each page runs once under AppTest in a fresh interpreter started with
+# `python -X importtime`, like the first visit after a container start (Streamlit
+# itself is already imported, the .cache/ files on disk are kept). The profile
+# lists the packages imported while the page script ran, by import time, and
+# the check exits with status 1 when a page takes longer than its budget.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PAGES = ("App.py", "Pages/1_EDA.py", "Pages/2_Predictor.py", "Pages/3_Explainability.py")
+
+# seconds for one cold run of the page script on the 1-core reference machine
+# (measured: App ~0.7, EDA ~0.8, Predictor ~2.0, Explainability ~6.5). Predictor
+# and Explainability wait on prewarm for the models / shap, which they really use.
+BUDGETS = {
+    "App.py": 2.0,
+    "Pages/1_EDA.py": 2.0,
+    "Pages/2_Predictor.py": 3.5,
+    "Pages/3_Explainability.py": 10.0,
+}
+
+MARKER = "import_profile: page start"
+
+
+def _child(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(page, default_timeout=300)
+    print(MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "exceptions": [e.value for e in at.exception]}))
+
+
+def parse_importtime(stderr):
+    # -> {root package: (seconds, modules)} for the imports after MARKER
+    _, found, page_part = stderr.partition(MARKER)
+    packages = {}
+    for line in (page_part if found else "").splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|", 2)
+        root = name.strip().split(".")[0]
+        seconds, modules = packages.get(root, (0.0, 0))
+        packages[root] = (seconds + int(self_us) / 1e6, modules + 1)
+    return packages
+
+
+def profile(page):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child", page],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page} failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    packages = parse_importtime(proc.stderr)
+    result["page"] = page
+    result["import_seconds"] = sum(seconds for seconds, _ in packages.values())
+    result["packages"] = {root: {"seconds": s, "modules": n}
+                          for root, (s, n) in sorted(packages.items(), key=lambda kv: -kv[1][0])}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cold page loads and check them against a time budget.")
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--top", type=int, default=8, help="packages to list per page")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slower machines)")
+    parser.add_argument("--output", help="write the profiles as JSON to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    results, over = [], []
+    for page in args.pages:
+        result = profile(page)
+        budget = BUDGETS.get(page, max(BUDGETS.values())) * args.scale
+        result["budget_seconds"] = budget
+        results.append(result)
+        status = "ok" if result["seconds"] <= budget else "OVER BUDGET"
+        print(f"{page}: {result['seconds']:.2f}s cold load (budget {budget:.2f}s) {status}, "
+              f"{result['import_seconds']:.2f}s in imports")
+        for root, stats in list(result["packages"].items())[:args.top]:
+            print(f"    {root:<24} {stats['seconds'] * 1000:8.1f} ms  {stats['modules']:4d} modules")
+        if result["exceptions"]:
+            print(f"    exceptions: {result['exceptions']}")
+        if status != "ok":
+            over.append(page)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# load_test.py
+# Concurrent-session load test: N simulated visitors through a fixed script.
+#
+#   python load_test.py --sessions 1 2 4 8                        # AppTest sessions
+#   python load_test.py --target server --sessions 1 4 16         # against `streamlit run`
+#   python load_test.py --target server --url ws://127.0.0.1:8501 # an already running server
+#
+# Every session does what one visitor does: load Home, open EDA and pick CHARTS
+# options in each chart multiselect, predict on both Predictor tabs, and open
+# Explainability. Latency is per rerun, from the request to the end of the script
+# run (fragment reruns included). For each N the report has p50/p99 latency,
+# throughput (reruns/s over the wall time of the N sessions) and peak memory.
+#
+# apptest: a process pool with one session per process, run in-process with
+#   AppTest. Every process has its own caches, so this is what a per-session copy
+#   of the data and the models costs: peak memory is the sum of the processes'.
+# server:  one `streamlit run` per N (so its high-water mark belongs to that N) and
+#   a pool of websocket clients that speak the browser's protocol. Peak memory is
+#   the server's; with --url the server is not ours and memory is not measured.
+#
+# Every worker runs the script once as warm-up before the N sessions start
+# together, so the latencies are warm reruns; the cold first load is what
+# import_profile.py measures.
+#
+# Both targets run the app staged by deploy.stage_app, so that Streamlit finds the
+# pages on a case-sensitive file system.
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import deploy
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CHARTS = 2  # options picked in each EDA multiselect
+EDA_SECTIONS = ("categorical", "numeric", "scatter")
+PREDICT_BUTTONS = ("predict_course", "predict_nocourse")
+SERVER_PORT = 8599
+TIMEOUT = 600
+
+_state = {}
+
+
+def peak_rss(pid="self"):
+    # (peak, current) resident bytes of a process from /proc/<pid>/status
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmHWM", "VmRSS"):
+                values[key] = int(value.split()[0]) * 1024
+    return values["VmHWM"], values["VmRSS"]
+
+
+def _timed(record, step, fn):
+    start = time.perf_counter()
+    result = fn()
+    record.append((step, time.perf_counter() - start))
+    return result
+
+
+def apptest_script(main_script, record):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(main_script, default_timeout=TIMEOUT)
+    errors = []
+
+    def run(step):
+        _timed(record, step, at.run)
+        errors.extend(f"{step}: {e.value}" for e in at.exception)
+
+    run("home")
+    at.switch_page("pages/1_EDA.py")
+    run("eda")
+    for section, multiselect in zip(EDA_SECTIONS, at.multiselect):
+        multiselect.set_value(multiselect.options[:CHARTS])
+        run(f"eda.{section}")
+    at.switch_page("pages/2_Predictor.py")
+    run("predictor")
+    for key in PREDICT_BUTTONS:
+        at.button(key=key).click()
+        run(key.replace("_", "."))
+    at.switch_page("pages/3_Explainability.py")
+    run("explainability")
+    return errors
+
+
+class ServerSession:
+    # One browser tab: rerun requests (BackMsg) over the websocket, deltas
+    # (ForwardMsg) back until the script run has finished.
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.pages = {}  # page name -> page script hash, from the navigation message
+        self.page_hash = ""
+        self.widgets = {}  # widget id -> WidgetState of the current page
+
+    def switch_page(self, name):
+        self.page_hash = self.pages[name]
+        self.widgets = {}
+
+    def rerun(self, trigger=None, fragment_id=""):
+        # -> (elements, errors); elements are (element proto, fragment id) in delta order
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = ""
+        state.page_script_hash = self.page_hash
+        state.fragment_id = fragment_id
+        state.widget_states.widgets.extend(self.widgets.values())
+        if trigger:
+            state.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        self.ws.send(msg.SerializeToString())
+
+        elements, errors = [], []
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(self.ws.recv(timeout=TIMEOUT))
+            kind = fwd.WhichOneof("type")
+            if kind == "navigation":
+                self.pages = {page.page_name: page.page_script_hash for page in fwd.navigation.app_pages}
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                elements.append((element, fwd.delta.fragment_id))
+                if element.WhichOneof("type") == "exception":
+                    errors.append(element.exception.message)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    errors.append("compile error")
+                if fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return elements, errors
+
+
+def server_script(url, record):
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+    from websockets.sync.client import connect
+
+    errors = []
+
+    def run(step, **kwargs):
+        elements, step_errors = _timed(record, step, lambda: session.rerun(**kwargs))
+        errors.extend(f"{step}: {e}" for e in step_errors)
+        return elements
+
+    with connect(f"{url}/_stcore/stream", subprotocols=["streamlit"], max_size=None, open_timeout=60) as ws:
+        session = ServerSession(ws)
+        run("home")
+        session.switch_page("EDA")
+        elements = run("eda")
+        multiselects = [(e.multiselect, fragment) for e, fragment in elements if e.WhichOneof("type") == "multiselect"]
+        for section, (multiselect, fragment) in zip(EDA_SECTIONS, multiselects):
+            state = WidgetState(id=multiselect.id)
+            state.string_array_value.data.extend(multiselect.options[:CHARTS])
+            session.widgets[multiselect.id] = state
+            run(f"eda.{section}", fragment_id=fragment)
+        session.switch_page("Predictor")
+        elements = run("predictor")
+        buttons = {e.button.id: fragment for e, fragment in elements if e.WhichOneof("type") == "button"}
+        for key in PREDICT_BUTTONS:
+            button_id = next(i for i in buttons if i.endswith(key))
+            run(key.replace("_", "."), trigger=button_id, fragment_id=buttons[button_id])
+        session.switch_page("Explainability")
+        run("explainability")
+    return errors
+
+
+def _script(target):
+    if target == "apptest":
+        return lambda record: apptest_script(_state["main_script"], record)
+    return lambda record: server_script(_state["url"], record)
+
+
+def _init_worker(barrier, main_script, url):
+    os.chdir(ROOT)
+    _state.update(barrier=barrier, main_script=main_script, url=url)
+
+
+def _session(args):
+    target, iterations = args
+    script = _script(target)
+    if target == "apptest":
+        script([])  # warm-up: imports and the caches of this process
+    warm_rss = peak_rss()[1]
+    _state["barrier"].wait(TIMEOUT)
+
+    record, errors = [], []
+    started = time.time()
+    for _ in range(iterations):
+        errors += script(record)
+    return {
+        "started": started,
+        "finished": time.time(),
+        "record": record,
+        "errors": errors,
+        "pid": os.getpid(),
+        "warm_rss": warm_rss,
+        "peak_rss": peak_rss()[0],
+    }
+
+
+def start_server(main_script, port):
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", main_script,
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.headless", "true",
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    process = subprocess.Popen(cmd, cwd=ROOT, env=deploy.app_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deploy.wait_healthy([port])
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process
+
+
+def run_level(n_sessions, target, main_script, iterations, url=None, port=SERVER_PORT):
+    server = None
+    if target == "server" and url is None:
+        server = start_server(main_script, port)
+        url = f"ws://127.0.0.1:{port}"
+    try:
+        server_warm_rss = None
+        if target == "server":
+            server_script(url, [])  # warm-up: the server's caches and prewarm
+            if server:
+                server_warm_rss = peak_rss(server.pid)[1]
+
+        barrier = mp.Barrier(n_sessions)
+        # one session per process: every task waits at the barrier until all N have started
+        with mp.Pool(n_sessions, initializer=_init_worker, initargs=(barrier, main_script, url)) as pool:
+            sessions = pool.map(_session, [(target, iterations)] * n_sessions, chunksize=1)
+        server_peak_rss = peak_rss(server.pid)[0] if server else None
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    return summarize(n_sessions, target, sessions, server_warm_rss, server_peak_rss)
+
+
+def summarize(n_sessions, target, sessions, server_warm_rss=None, server_peak_rss=None):
+    latencies = np.array([seconds for s in sessions for _, seconds in s["record"]]) * 1000
+    wall = max(s["finished"] for s in sessions) - min(s["started"] for s in sessions)
+    steps = {}
+    for s in sessions:
+        for step, seconds in s["record"]:
+            steps.setdefault(step, []).append(seconds * 1000)
+
+    if target == "apptest":
+        # every process holds its own copy: the footprint of N sessions is the sum
+        peak = sum(s["peak_rss"] for s in sessions)
+        warm = sum(s["warm_rss"] for s in sessions)
+    else:
+        peak, warm = server_peak_rss, server_warm_rss
+    return {
+        "sessions": n_sessions,
+        "target": target,
+        "reruns": len(latencies),
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else None,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "peak_rss_mb": peak / 2**20 if peak else None,
+        "warm_rss_mb": warm / 2**20 if warm else None,
+        "steps_p50_ms": {step: float(np.median(ms)) for step, ms in steps.items()},
+        "errors": [e for s in sessions for e in s["errors"]],
+    }
+
+
+def print_level(result):
+    peak = f"{result['peak_rss_mb']:8.0f} MB" if result["peak_rss_mb"] else "       n/a"
+    print(f"N={result['sessions']:<3} {result['reruns']:5d} reruns  p50 {result['p50_ms']:8.1f} ms  "
+          f"p99 {result['p99_ms']:8.1f} ms  {result['throughput_rps']:6.2f} reruns/s  peak RSS {peak}", flush=True)
+    steps = "  ".join(f"{step} {ms:.0f}" for step, ms in result["steps_p50_ms"].items())
+    print(f"      p50 per step (ms): {steps}")
+    for error in result["errors"][:5]:
+        print(f"      error: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive N concurrent sessions through the app and report latency, "
+                                                 "throughput and peak memory.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4], help="values of N")
+    parser.add_argument("--target", choices=("apptest", "server"), default="apptest")
+    parser.add_argument("--url", help="ws://host:port of a running server (server target only)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="port of the server started for each N")
+    parser.add_argument("--iterations", type=int, default=1, help="times every session runs the script")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="load_test_") as directory:
+        main_script = deploy.stage_app(directory)
+        for n_sessions in args.sessions:
+            result = run_level(n_sessions, args.target, main_script, args.iterations, args.url, args.port)
+            results.append(result)
+            print_level(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "charts": CHARTS, "iterations": args.iterations,
+                       "levels": results}, f, indent=2)
+    if any(result["errors"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
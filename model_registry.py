@@ -0,0 +1,91 @@
+# model_registry.py
+# Process-wide registry for the pickled pipelines (course_model.pkl, nocourse_model.pkl).
+#
+# Each file is unpickled once and shared by every session. On every lookup the
+# file is stat'ed; if its mtime/size changed, the new version is loaded on the
+# side and swapped in with a single dict assignment, so readers always see a
+# complete (model, version) pair and the server never needs a restart.
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+import features as fs
+import session_memory as sm
+import timing as tm
+
+COURSE_MODEL = "course_model.pkl"
+NOCOURSE_MODEL = "nocourse_model.pkl"
+
+_lock = threading.Lock()
+_entries = {}  # abs path -> entry dict
+
+
+def _load_entry(path, stat):
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    start = time.perf_counter()
+    model = pickle.loads(raw)
+    load_seconds = time.perf_counter() - start
+    tm.record("model.unpickle", load_seconds, model=os.path.basename(path))
+
+    return {
+        "path": path,
+        "model": model,
+        "version": hashlib.sha1(raw).hexdigest(),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "load_seconds": load_seconds,
+        "memory_bytes": sm.nbytes(model),
+        "loaded_at": time.time(),
+    }
+
+
+def _is_current(entry, stat):
+    return entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+
+def get_entry(path):
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+
+    entry = _entries.get(abs_path)
+    if _is_current(entry, stat):
+        return entry
+
+    with _lock:
+        entry = _entries.get(abs_path)
+        if _is_current(entry, stat):
+            return entry
+        new_entry = _load_entry(abs_path, stat)
+        if entry is not None and entry["version"] == new_entry["version"]:
+            # touched but unchanged: keep the loaded object, just refresh the stat
+            new_entry = dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        _entries[abs_path] = new_entry
+        return new_entry
+
+
+def get_model(path):
+    return get_entry(path)["model"]
+
+
+def model_version(path):
+    return get_entry(path)["version"]
+
+
+def dropout_proba(pipeline, X):
+    # class 1 is "no dropout" (Dropout-vs-rest target), so the risk is 1 - P(class 1)
+    return 1 - pipeline.predict_proba(fs.array_frame(X, fs.model_features(pipeline)))[:, 1]
+
+
+def model_info():
+    # Load time / memory footprint (deep size of the unpickled objects, the same
+    # whatever else the process is doing) of every loaded model, without the model
+    # object. The first model loaded in a process also pays for importing sklearn.
+    return [
+        {k: v for k, v in entry.items() if k != "model"}
+        for entry in list(_entries.values())
+    ]
@@ -0,0 +1,88 @@
+# precompute_shap.py
+# Offline job: SHAP values of the whole dataset for both pipelines.
+#
+# Rows are explained in chunks spread over a process pool and written into a
+# .npy file (memory-mappable) keyed by model hash and data hash, see
+# explainers.global_shap_path. The Global tab of the Explainability page picks
+# these files up automatically.
+#
+#   python precompute_shap.py --workers 8 --chunksize 500
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import data_loader as dl
+import explainers as ex
+import features as fs
+import model_registry as mr
+
+MODEL_PATHS = (mr.COURSE_MODEL, mr.NOCOURSE_MODEL)
+
+_worker = {}
+
+
+def _init_worker(model_path, data_path):
+    # Each worker unpickles the model and memory-maps the data once
+    pipeline = mr.get_model(model_path)
+    _worker["pipeline"] = pipeline
+    _worker["explainer"] = ex.get_explainer(pipeline, mr.model_version(model_path))
+    _worker["X"] = fs.frame_array(dl.load_data(data_path), fs.model_features(pipeline))
+
+
+def _explain_chunk(start, stop):
+    pipeline = _worker["pipeline"]
+    X_tr = ex.transform(pipeline, _worker["X"][start:stop])
+    shap_values = _worker["explainer"].shap_values(X_tr, check_additivity=False)
+    return start, ex.positive_class(shap_values).astype(np.float32)
+
+
+def precompute(model_path, data_path=dl.DATA_PATH, workers=None, chunksize=500, force=False):
+    model_version = mr.model_version(model_path)
+    data_version, df = dl.load_versioned(data_path)
+    out_path = ex.global_shap_path(model_path, model_version, data_version)
+    if os.path.exists(out_path) and not force:
+        return out_path, 0.0
+
+    n_rows = len(df)
+    n_features = len(fs.model_features(mr.get_model(model_path)))
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp.npy"
+    out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(n_rows, n_features))
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, data_path)) as pool:
+        futures = [
+            pool.submit(_explain_chunk, start, min(start + chunksize, n_rows))
+            for start in range(0, n_rows, chunksize)
+        ]
+        for future in as_completed(futures):
+            start, values = future.result()
+            out[start:start + len(values)] = values
+    out.flush()
+    del out
+    os.replace(tmp_path, out_path)
+    return out_path, time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute full-population SHAP values for both models.")
+    parser.add_argument("--data", default=dl.DATA_PATH, help="data.csv-shaped file to explain")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=500, help="rows per task")
+    parser.add_argument("--force", action="store_true", help="recompute even if the file exists")
+    args = parser.parse_args()
+
+    for model_path in MODEL_PATHS:
+        out_path, elapsed = precompute(model_path, args.data, args.workers, args.chunksize, args.force)
+        status = f"done in {elapsed:.1f}s" if elapsed else "already up to date"
+        print(f"{model_path}: {status} -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
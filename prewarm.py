@@ -0,0 +1,131 @@
+# prewarm.py
+# Warms the process-wide caches in background threads as soon as the app starts:
+# the dataset, both pipelines, their TreeExplainers and the global SHAP values.
+# Each step starts once the steps in DEPENDS are done, so loading the models
+# does not wait behind the CSV parse, and a step only fails with its own
+# dependencies (a bad data.csv does not take the Predictor down).
+#
+# start() is idempotent and can be called from every page; pages block on
+# ready(<step>).result() and then read the data/models from their loaders (the
+# futures only say "warm"; they hold no frame that could go stale). start()
+# retries the steps that failed. timings() reports how long each step took, so
+# cold-start latency can be tracked.
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import data_loader as dl
+import explainers as ex
+import features as fs
+import model_registry as mr
+import timing as tm
+import tree_arrays as ta
+
+STEPS = ("data", "models", "explainers", "global_shap")
+DEPENDS = {
+    "data": (),
+    "models": (),
+    "explainers": ("models",),
+    "global_shap": ("data", "explainers"),
+}
+DATA_PATH = "data.csv"
+MODEL_PATHS = (mr.COURSE_MODEL, mr.NOCOURSE_MODEL)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_futures = {}
+_timings = {}
+_started = time.perf_counter()
+
+
+def _warm_data():
+    dl.load_data(DATA_PATH)
+
+
+def _warm_models():
+    for path in MODEL_PATHS:
+        mr.get_model(path)
+        ta.get_compiled(path)  # tree arrays used for online scoring
+
+
+def _warm_explainers():
+    for path in MODEL_PATHS:
+        ex.get_explainer(mr.get_model(path), mr.model_version(path))
+
+
+def _warm_global_shap():
+    for path in MODEL_PATHS:
+        pipeline, version = mr.get_model(path), mr.model_version(path)
+        names = fs.model_features(pipeline)
+        # the frame and its version key come from the same load
+        data_version, X = dl.view_versioned(("model_frame",) + names, lambda df: fs.model_frame(df, names), DATA_PATH)
+        precomputed = ex.load_global_shap(path, version, data_version)
+        if precomputed is not None:
+            # touch the pages so the first plot does not wait on disk
+            np.add.reduce(precomputed, axis=None)
+        else:
+            ex.compute_global_shap_sampled(pipeline, version, X, data_version, sample_size=300)
+
+
+_WORK = {
+    "data": _warm_data,
+    "models": _warm_models,
+    "explainers": _warm_explainers,
+    "global_shap": _warm_global_shap,
+}
+
+
+def _run(step, futures):
+    for dependency in DEPENDS[step]:
+        if futures[dependency].exception() is not None:  # blocks until it is done
+            futures[step].set_exception(RuntimeError(f"prewarm step {dependency!r} failed"))
+            return
+    start = time.perf_counter()
+    try:
+        _WORK[step]()
+    except Exception as exc:
+        logger.exception("prewarm step %r failed", step)
+        futures[step].set_exception(exc)
+        return
+    _timings[step] = time.perf_counter() - start
+    tm.record(f"prewarm.{step}", _timings[step])
+    logger.info("prewarm %s: %.2fs", step, _timings[step])
+    futures[step].set_result(None)
+    if all(f.done() and f.exception() is None for f in futures.values()):
+        _timings["total"] = time.perf_counter() - _started
+
+
+def _failed(future):
+    return future.done() and future.exception() is not None
+
+
+def start():
+    # (Re)start every step that has not started yet or has failed
+    global _started
+    with _lock:
+        steps = [step for step in STEPS if step not in _futures or _failed(_futures[step])]
+        if steps:
+            if len(steps) == len(STEPS):
+                _started = time.perf_counter()
+            for step in steps:
+                _futures[step] = Future()
+                _futures[step].set_running_or_notify_cancel()
+            futures = dict(_futures)
+            for step in steps:
+                threading.Thread(target=_run, args=(step, futures), name=f"prewarm-{step}", daemon=True).start()
+    return _futures[STEPS[-1]]
+
+
+def ready(step):
+    start()
+    return _futures[step]
+
+
+def timings():
+    # step -> seconds for the steps finished so far (plus "total" once all are done)
+    return dict(_timings)
@@ -0,0 +1,110 @@
+# schema.py
+# Compact dtypes and code <-> label lookups for data.csv, built from the
+# codebooks in variables.py.
+#
+# Integer columns (codes and counts) are stored in the smallest signed int type
+# that holds them and Target as a pandas Categorical. Floats (grades, rates, the
+# economic indicators) stay float64: they are model features, and the pipelines
+# were fitted on float64, so rounding them changes predictions. Codebook gives
+# O(1) lookups both ways and vectorized decoding.
+
+import numpy as np
+import pandas as pd
+
+import features as fs
+import variables as vr
+
+TARGET = "Target"
+
+
+class Codebook:
+    def __init__(self, mapping):
+        self.labels = dict(mapping)  # code -> label
+        self.codes = {label: code for code, label in mapping.items()}  # label -> code
+        self._sorted_codes = np.array(sorted(mapping))
+        self._sorted_labels = np.array([mapping[c] for c in self._sorted_codes], dtype=object)
+
+    def label(self, code, default=None):
+        return self.labels.get(code, default)
+
+    def code(self, label):
+        return self.codes[label]
+
+    def decode(self, values):
+        # codes -> labels as an object array; codes outside the codebook are kept as they are
+        values = np.asarray(values)
+        out = values.astype(object)
+        if len(self._sorted_codes) == 0 or values.size == 0:
+            return out
+        pos = np.clip(np.searchsorted(self._sorted_codes, values), 0, len(self._sorted_codes) - 1)
+        known = self._sorted_codes[pos] == values
+        out[known] = self._sorted_labels[pos[known]]
+        return out
+
+
+# feature name -> codebook (see features.SCHEMA for the CSV headers)
+CODEBOOKS = {
+    "marital": Codebook(vr.marital_status),
+    "app_mode": Codebook(vr.application_mode),
+    "course": Codebook(vr.courses),
+    "attendance": Codebook(vr.attendance),
+    "prev_qual": Codebook(vr.previous_qualification),
+    "nationality": Codebook(vr.nationalities),
+    "gender": Codebook(vr.gender),
+    "mother_qual": Codebook(vr.mother_qual),
+    "father_qual": Codebook(vr.fathers_qualification),
+    "mother_job": Codebook(vr.mothers_occupation),
+    "father_job": Codebook(vr.fathers_occupation),
+    "displaced": Codebook(vr.yes_no),
+    "special_needs": Codebook(vr.yes_no),
+    "scholarship": Codebook(vr.yes_no),
+    "international": Codebook(vr.yes_no),
+    "debtor": Codebook(vr.yes_no),
+    "fees": Codebook(vr.yes_no),
+}
+CSV_CODEBOOKS = {fs.FEATURE_TO_CSV[name]: cb for name, cb in CODEBOOKS.items()}
+
+_by_mapping = {}  # id(variables.py dict) -> (dict, Codebook)
+
+
+def codebook(mapping):
+    # Codebook for one of the variables.py dicts, built once
+    entry = _by_mapping.get(id(mapping))
+    if entry is None or entry[0] is not mapping:
+        entry = (mapping, Codebook(mapping))
+        _by_mapping[id(mapping)] = entry
+    return entry[1]
+
+
+def _int_dtype(values):
+    if len(values) == 0:
+        return np.int8
+    lo, hi = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+
+def compact(df):
+    # Same frame with compact dtypes (ints downcast, categorical Target, floats unchanged)
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col == TARGET:
+            columns[col] = series.astype("category")
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            columns[col] = series.astype(_int_dtype(series.to_numpy()))
+        else:
+            columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def decode_frame(df):
+    # Codes -> labels for every column with a codebook (feature names or CSV headers)
+    decoded = {}
+    for col in df.columns:
+        cb = CODEBOOKS.get(col) or CSV_CODEBOOKS.get(col)
+        decoded[col] = cb.decode(df[col].to_numpy()) if cb is not None else df[col]
+    return pd.DataFrame(decoded, index=df.index)
@@ -0,0 +1,235 @@
+# scoring_service.py
+# Local JSON scoring service for the two dropout pipelines (no Streamlit needed).
+#
+#   python scoring_service.py --port 8600
+#
+#   POST /score    {"students": [{"age": 19, "course": 9500, ...}, ...]}
+#                  or a single {"age": 19, ...} object. Keys are feature names
+#                  (features.SCHEMA) or data.csv headers; missing ones are imputed.
+#                  -> {"scores": [{"dropout_course": 0.71, "dropout_nocourse": 0.66}, ...]}
+#   GET  /metrics  request latency p50/p99 and batching stats
+#   GET  /health
+#
+# Requests that arrive within --max-wait-ms of each other are coalesced into a
+# single batch per model, scored with tree_arrays.dropout_proba (the compiled
+# arrays up to tree_arrays.MAX_ROWS rows, the sklearn pipeline for bigger
+# batches) in a worker thread so the event loop keeps accepting requests
+# meanwhile.
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+import batch_scoring as bs
+import features as fs
+import model_registry as mr
+import tree_arrays as ta
+
+MAX_WAIT_MS = 5
+MAX_BATCH_ROWS = ta.MAX_ROWS
+LATENCY_WINDOW = 10_000
+HEAD_LIMIT = 64 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class MicroBatcher:
+    # Collects rows for one model and scores them together
+    def __init__(self, model_path, max_wait=MAX_WAIT_MS / 1000, max_rows=MAX_BATCH_ROWS):
+        self.model_path = model_path
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.rows = 0
+
+    async def score(self, values):
+        # values: one feature-name -> value dict per student
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((values, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            try:
+                scores = await loop.run_in_executor(None, self._predict, [v for v, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += n_rows
+            start = 0
+            for values, future in pending:
+                if not future.done():
+                    future.set_result(scores[start:start + len(values)])
+                start += len(values)
+
+    def _predict(self, requests):
+        pipeline = mr.get_model(self.model_path)
+        names = fs.model_features(pipeline)
+        X = np.vstack([fs.row_array(values, names) for students in requests for values in students])
+        return ta.dropout_proba(self.model_path, X).tolist()
+
+
+def parse_students(payload):
+    students = payload.get("students", [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(students, list) or not students:
+        raise ValueError("Expected a student object or {\"students\": [...]}")
+
+    parsed = []
+    for student in students:
+        if not isinstance(student, dict):
+            raise ValueError("Each student must be a JSON object")
+        values = {}
+        for key, value in student.items():
+            name = key if key in fs.SCHEMA else fs.CSV_TO_FEATURE.get(key)
+            if name is None or name == fs.TARGET:
+                raise ValueError(f"Unknown feature '{key}'")
+            # bool is an int subclass: JSON true/false is not a feature value
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ValueError(f"Feature '{key}' must be a number or null")
+            values[name] = value
+        parsed.append(values)
+    return parsed
+
+
+class ScoringService:
+    def __init__(self, models=bs.MODELS, max_wait_ms=MAX_WAIT_MS, max_rows=MAX_BATCH_ROWS):
+        self.batchers = {out: MicroBatcher(path, max_wait_ms / 1000, max_rows) for out, path in models.items()}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+
+    async def start(self):
+        for batcher in self.batchers.values():
+            asyncio.create_task(batcher.run())
+
+    async def score(self, body):
+        students = parse_students(json.loads(body))
+        results = await asyncio.gather(*(b.score(students) for b in self.batchers.values()))
+        columns = dict(zip(self.batchers, results))
+        return {"scores": [{out: columns[out][i] for out in columns} for i in range(len(students))]}
+
+    def metrics(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "p99": float(np.percentile(latencies, 99)) if len(latencies) else None,
+                "window": len(latencies),
+            },
+            "batches": {
+                out: {"batches": b.batches, "rows": b.rows, "mean_rows": b.rows / b.batches if b.batches else None}
+                for out, b in self.batchers.items()
+            },
+            "models": {out: mr.model_version(b.model_path) for out, b in self.batchers.items()},
+        }
+
+    async def route(self, method, path, body):
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics()
+        if path != "/score":
+            return 404, {"error": f"Unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST /score"}
+
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            result = await self.score(body)
+        except ValueError as e:  # bad JSON or bad features
+            self.errors += 1
+            return 400, {"error": str(e)}
+        self.latencies.append(time.perf_counter() - start)
+        return 200, result
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                try:
+                    status, payload = await self.route(method, path.split("?", 1)[0], body)
+                except Exception as e:
+                    self.errors += 1
+                    status, payload = 500, {"error": str(e)}
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, max_wait_ms, max_rows):
+    # load both models before accepting requests
+    for path in bs.MODELS.values():
+        mr.get_model(path)
+    service = ScoringService(max_wait_ms=max_wait_ms, max_rows=max_rows)
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port, limit=HEAD_LIMIT)
+    print(f"Scoring service on http://{host}:{port} (POST /score, GET /metrics)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON scoring service with request micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS, help="how long a batch waits for more requests")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_ROWS, help="maximum rows per predict_proba call")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_wait_ms, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# session_memory.py
+# Bytes held by one browser session in st.session_state.
+#
+# The dataset and the frames derived from it (data_loader.view_versioned) are loaded once
+# per process and shared by every session, so they are reported as "shared"
+# and not charged to the session that happens to reference them.
+#
+# Sizes are deep: containers and plain objects are followed to their contents,
+# frames count their object columns (memory_usage(deep=True)), arrays count
+# the buffer they own or view, and an object reached twice is counted once.
+# tracemalloc cannot tell which session allocated what, so it only gives the
+# process totals. Nothing runs on a rerun; the report is computed when the Home
+# page panel is opened.
+#
+#   AV_TRACEMALLOC=5            trace allocations (5 frames) for the process totals
+
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import data_loader as dl
+
+TOP_SITES = 10
+
+
+def _configure():
+    frames = os.environ.get("AV_TRACEMALLOC")
+    if frames and not tracemalloc.is_tracing():
+        tracemalloc.start(int(frames))
+
+
+def nbytes(obj, seen=None):
+    # seen: id -> object, which also keeps the states built by __getstate__ alive
+    # (and their ids unique) until the walk ends
+    seen = {} if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(obj, pd.DataFrame) else int(usage)
+    if isinstance(obj, np.ndarray):
+        if isinstance(obj.base, np.ndarray):
+            return sys.getsizeof(obj) + nbytes(obj.base, seen)
+        # owned buffers are in getsizeof; others belong to a foreign owner (e.g. a Tree's nodes)
+        return sys.getsizeof(obj) + (0 if obj.flags.owndata else obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(nbytes(k, seen) + nbytes(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(nbytes(v, seen) for v in obj)
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += nbytes(vars(obj), seen)
+    elif getattr(type(obj), "__getstate__", object.__getstate__) is not object.__getstate__:
+        # extension types (e.g. sklearn's Tree) only expose their buffers through their state
+        size += nbytes(obj.__getstate__(), seen)
+    for name in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, name):
+            size += nbytes(getattr(obj, name), seen)
+    return size
+
+
+def report(state):
+    # {"keys": key -> bytes owned by the session, "session": total, "shared": bytes referenced but shared}
+    keys, shared, seen = {}, 0, {}
+    for key, value in dict(state).items():
+        if dl.is_shared(value):
+            shared += nbytes(value)
+        else:
+            keys[str(key)] = nbytes(value, seen)
+    keys = dict(sorted(keys.items(), key=lambda item: -item[1]))
+    return {"keys": keys, "session": sum(keys.values()), "shared": shared}
+
+
+def totals():
+    # The whole process, when AV_TRACEMALLOC is set: traced bytes now and at
+    # peak, and the top allocation sites
+    if not tracemalloc.is_tracing():
+        return {"tracemalloc": "off (set AV_TRACEMALLOC=<frames> before the server starts)"}
+    current, peak = tracemalloc.get_traced_memory()
+    stats = tracemalloc.take_snapshot().statistics("lineno")[:TOP_SITES]
+    return {"tracemalloc": {
+        "current": current,
+        "peak": peak,
+        "top": [{"site": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count} for stat in stats],
+    }}
+
+
+_configure()
@@ -0,0 +1,162 @@
+# timing.py
+# Lightweight timing spans around the hot paths of the pages.
+#
+#   with tm.span("predictor.predict", model="course"):
+#       ...
+#
+# A finished span costs two perf_counter() calls and a deque append. It goes to
+# a rolling window per span name (p50/p95 from stats(), written by export() for
+# capacity planning), to the "timing" logger as one JSON line, and to the list of
+# the current rerun that the debug sidebar shows.
+#
+#   AV_TIMING_LOG=.cache/timing.jsonl    write the JSON lines to this file
+#   AV_TIMING_DEBUG=1                    show the sidebar on every page
+#                                        (or open a page with ?debug=timing)
+#   AV_TIMING_EXPORT=spans.json          write stats() there when the process exits
+#
+# Pages call rerun() at the top and panel() at the end. Spans recorded by other
+# threads (prewarm) and by fragment reruns only go to the rolling windows and
+# the log.
+
+import atexit
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+WINDOW = 1000  # last spans kept per name for the percentiles
+
+logger = logging.getLogger("timing")
+
+_lock = threading.Lock()
+_windows = {}  # span name -> deque of seconds
+_counts = {}  # span name -> spans recorded since start
+_local = threading.local()  # spans / depth / panel of the rerun running in this thread
+
+
+def _configure():
+    path = os.environ.get("AV_TIMING_LOG")
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    export_path = os.environ.get("AV_TIMING_EXPORT")
+    if export_path:
+        atexit.register(export, export_path)
+
+
+def record(name, seconds, **fields):
+    with _lock:
+        window = _windows.get(name)
+        if window is None:
+            window = _windows[name] = deque(maxlen=WINDOW)
+        window.append(seconds)
+        _counts[name] = _counts.get(name, 0) + 1
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"ts": round(time.time(), 3), "pid": os.getpid(), "span": name,
+                                "ms": round(seconds * 1000, 3), **fields}, default=str))
+
+
+@contextlib.contextmanager
+def span(name, **fields):
+    spans = getattr(_local, "spans", None)
+    entry = None
+    if spans is not None:
+        entry = [name, None, _local.depth]
+        spans.append(entry)
+        _local.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        record(name, seconds, **fields)
+        if entry is not None:
+            _local.depth -= 1
+            entry[1] = seconds
+
+
+def timed(name):
+    # decorator form of span(), e.g. for the EDA section fragments
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stats():
+    # span name -> count and rolling p50/p95/mean/max in ms over the last WINDOW spans
+    with _lock:
+        windows = {name: np.array(window) * 1000 for name, window in _windows.items()}
+        counts = dict(_counts)
+    return {
+        name: {
+            "count": counts[name],
+            "window": len(ms),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "mean_ms": float(ms.mean()),
+            "max_ms": float(ms.max()),
+        }
+        for name, ms in sorted(windows.items())
+    }
+
+
+def export(path):
+    with open(path, "w") as f:
+        json.dump({"pid": os.getpid(), "exported_at": time.time(), "window": WINDOW, "spans": stats()}, f, indent=2)
+
+
+def debug_enabled():
+    import streamlit as st
+
+    return os.environ.get("AV_TIMING_DEBUG") == "1" or st.query_params.get("debug") == "timing"
+
+
+def rerun():
+    # Start the span list of this script run; with debug on, reserve the sidebar slot
+    _local.spans = []
+    _local.depth = 0
+    _local.panel = None
+    if debug_enabled():
+        import streamlit as st
+
+        _local.panel = st.sidebar.empty()
+
+
+def panel():
+    # Fill the sidebar slot with this rerun's spans. Called at the end of the page
+    # (and before st.stop()), outside any fragment.
+    slot = getattr(_local, "panel", None)
+    if slot is None:
+        return
+    import streamlit as st
+
+    rolling = stats()
+    lines = [f"{'span':<34}{'now':>9}{'p50':>9}{'p95':>9}"]
+    for name, seconds, depth in _local.spans:
+        label = ("  " * depth + name)[:33]
+        now = "..." if seconds is None else f"{seconds * 1000:.1f}"
+        p50 = f"{rolling[name]['p50_ms']:.1f}" if name in rolling else ""
+        p95 = f"{rolling[name]['p95_ms']:.1f}" if name in rolling else ""
+        lines.append(f"{label:<34}{now:>9}{p50:>9}{p95:>9}")
+    total = sum(s for _, s, depth in _local.spans if s is not None and depth == 0)
+    with slot.container():
+        st.markdown("**⏱️ This rerun (ms)**")
+        st.code("\n".join(lines), language=None)
+        st.caption(f"{total * 1000:.1f} ms in top-level spans")
+
+
+_configure()
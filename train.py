@@ -0,0 +1,361 @@
+# train.py
+# Rebuilds course_model.pkl and nocourse_model.pkl from data.csv.
+#
+#   python train.py                       # both models, 5-fold CV grid search on all cores
+#   python train.py --models nocourse --cv 3 --jobs 4
+#
+# Each pipeline is imputer (median) -> scaler -> random forest, fitted on the
+# binary Dropout-vs-rest target (1 = no dropout, the same encoding the pages
+# use). The hyperparameters are picked by a stratified, seeded grid search, so
+# the same data gives the same model. Every artifact gets a <model>.json next to
+# it with the data hash, CV scores, chosen parameters and training times.
+# Pickles are replaced atomically, so a running app picks the new version up
+# through model_registry without a restart.
+#
+#   python train.py --incremental         # after appending a new intake to data.csv
+#
+# The incremental mode updates the existing pipelines with the rows added since
+# they were trained, without touching the history: imputer medians come from
+# per-feature value counts kept in the .json sidecar, scaler moments from
+# StandardScaler.partial_fit, and the forest gets extra trees grown on the new
+# rows only (warm_start), optionally within a time budget.
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import pickle
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+import data_loader as dl
+import features as fs
+import model_registry as mr
+
+SEED = 42
+SCORING = "roc_auc"
+MODEL_PATHS = {"course": mr.COURSE_MODEL, "nocourse": mr.NOCOURSE_MODEL}
+
+PARAM_GRID = {
+    "model__n_estimators": [200, 400],
+    "model__max_depth": [10, 20, None],
+    "model__min_samples_leaf": [1, 4],
+    "model__max_features": ["sqrt", 0.5],
+}
+
+
+def build_pipeline(seed=SEED):
+    return Pipeline([
+        ("imputer", SimpleImputer(strategy="median")),
+        ("scaler", StandardScaler()),
+        ("model", RandomForestClassifier(random_state=seed, n_jobs=1)),
+    ])
+
+
+def read_csv(path):
+    # -> (sha1, DataFrame) of the raw CSV, parsed from the bytes that were hashed.
+    # Training reads the file itself rather than the data_loader cache, so the
+    # features are exactly the float64 values the app scores (no cache dtypes).
+    with open(path, "rb") as f:
+        raw = f.read()
+    return hashlib.sha1(raw).hexdigest(), pd.read_csv(io.BytesIO(raw), sep=";")
+
+
+def training_data(df, names):
+    # features as a DataFrame (named columns -> pipeline.feature_names_in_) and the binary target
+    X = pd.DataFrame(fs.frame_array(df, names), columns=list(names))
+    y = (df[fs.TARGET_CSV] != "Dropout").to_numpy().astype(np.int64)
+    return X, y
+
+
+def metadata_path(model_path):
+    return os.path.splitext(model_path)[0] + ".json"
+
+
+def load_metadata(model_path):
+    with open(metadata_path(model_path)) as f:
+        return json.load(f)
+
+
+def value_counts(X):
+    # feature -> [sorted values, counts] of the non-missing values (running median state)
+    counts = {}
+    for name in X.columns:
+        col = X[name].to_numpy()
+        values, n = np.unique(col[~np.isnan(col)], return_counts=True)
+        counts[name] = [values.tolist(), n.tolist()]
+    return counts
+
+
+def merge_counts(a, b):
+    merged, inverse = np.unique(np.concatenate([a[0], b[0]]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([a[1], b[1]]), minlength=len(merged))
+    return [merged.tolist(), counts.astype(np.int64).tolist()]
+
+
+def median_from_counts(values, counts):
+    # same as np.nanmedian over the original values (mean of the two middle ones for even n)
+    cum = np.cumsum(counts)
+    n = cum[-1]
+    lo = values[np.searchsorted(cum, (n - 1) // 2, side="right")]
+    hi = values[np.searchsorted(cum, n // 2, side="right")]
+    return (lo + hi) / 2
+
+
+def history_sha1s(path, n_rows):
+    # sha1 of the header + first n_rows lines, with and without the last newline
+    # (the file may not have ended with one when the model was trained)
+    h = hashlib.sha1()
+    last = b""
+    with open(path, "rb") as f:
+        for _, line in zip(range(n_rows + 1), f):
+            h.update(last)
+            last = line
+    stripped = h.copy()
+    h.update(last)
+    stripped.update(last.rstrip(b"\r\n"))
+    return {h.hexdigest(), stripped.hexdigest()}
+
+
+def _scaler_params(scaler):
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def _f32(x):
+    return np.asarray(x, dtype=np.float32).astype(np.float64)
+
+
+def rescale_thresholds(model, old_params, new_params, values):
+    # The trees split on scaled features: move every threshold into the new scaler's
+    # space so the existing trees send every observed value (values: sorted raw
+    # values per feature index) to the same side as before. Like sklearn, the new
+    # threshold is the midpoint between the float32 inputs on either side of the split.
+    (old_mean, old_scale), (new_mean, new_scale) = old_params, new_params
+    old_x = [_f32((v - old_mean[i]) / old_scale[i]) for i, v in enumerate(values)]
+    new_x = [_f32((v - new_mean[i]) / new_scale[i]) for i, v in enumerate(values)]
+
+    for estimator in np.ravel(model.estimators_):
+        state = estimator.tree_.__getstate__()
+        nodes = state["nodes"].copy()
+        for node in np.flatnonzero(nodes["left_child"] != -1):
+            f, t = nodes["feature"][node], nodes["threshold"][node]
+            n_left = np.searchsorted(old_x[f], t, side="right")  # observed values going left
+            if n_left == 0:
+                new_t = min((t * old_scale[f] + old_mean[f] - new_mean[f]) / new_scale[f], np.nextafter(new_x[f][0], -np.inf))
+            elif n_left == len(new_x[f]):
+                new_t = max((t * old_scale[f] + old_mean[f] - new_mean[f]) / new_scale[f], new_x[f][-1])
+            else:
+                lo, hi = new_x[f][n_left - 1], new_x[f][n_left]
+                new_t = lo / 2 + hi / 2
+                if new_t >= hi:
+                    new_t = lo
+            nodes["threshold"][node] = new_t
+        estimator.tree_.__setstate__(dict(state, nodes=nodes))
+
+
+def grow_forest(model, X, y, n_new_trees, time_budget=None, chunk=10, jobs=-1):
+    # warm-start n_new_trees more trees on (X, y), in chunks, stopping early once time_budget (s) is spent
+    start = time.perf_counter()
+    target = len(model.estimators_) + n_new_trees
+    model.set_params(warm_start=True, n_jobs=jobs)
+    while len(model.estimators_) < target:
+        if time_budget is not None and time.perf_counter() - start > time_budget:
+            break
+        model.set_params(n_estimators=min(target, len(model.estimators_) + chunk))
+        model.fit(X, y)
+    model.set_params(warm_start=False, n_jobs=1, n_estimators=len(model.estimators_))
+    return time.perf_counter() - start
+
+
+def save_artifact(pipeline, model_path, metadata):
+    # pickle + metadata, each written to a temp file and moved into place
+    raw = pickle.dumps(pipeline)
+    metadata = dict(metadata, model_sha1=hashlib.sha1(raw).hexdigest())
+    for path, data in ((metadata_path(model_path), json.dumps(metadata, indent=2).encode()), (model_path, raw)):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return metadata
+
+
+def train(name, df, data_sha1, data_path=dl.DATA_PATH, cv=5, jobs=-1, seed=SEED, param_grid=PARAM_GRID):
+    names = fs.MODEL_FEATURES[name]
+    X, y = training_data(df, names)
+
+    search = GridSearchCV(
+        build_pipeline(seed),
+        param_grid,
+        scoring=SCORING,
+        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=seed),
+        n_jobs=jobs,
+        refit=False,
+    )
+    start = time.perf_counter()
+    search.fit(X, y)
+    search_seconds = time.perf_counter() - start
+
+    best = search.best_index_
+    fold_scores = [float(search.cv_results_[f"split{i}_test_score"][best]) for i in range(cv)]
+
+    pipeline = build_pipeline(seed).set_params(**search.best_params_)
+    pipeline.set_params(model__n_jobs=jobs)
+    start = time.perf_counter()
+    pipeline.fit(X, y)
+    fit_seconds = time.perf_counter() - start
+    pipeline.set_params(model__n_jobs=1)  # single-row scoring is faster without a thread pool
+
+    metadata = {
+        "model": name,
+        "features": list(names),
+        "target": "1 = not Dropout (Graduate or Enrolled), 0 = Dropout",
+        "data_path": os.path.basename(data_path),
+        "data_sha1": data_sha1,
+        "n_rows": int(len(y)),
+        "positive_rate": float(y.mean()),
+        "value_counts": value_counts(X),
+        "seed": seed,
+        "params": {k.removeprefix("model__"): v for k, v in search.best_params_.items()},
+        "cv": {
+            "scoring": SCORING,
+            "folds": cv,
+            "mean": float(np.mean(fold_scores)),
+            "std": float(np.std(fold_scores)),
+            "per_fold": fold_scores,
+            "candidates": len(search.cv_results_["params"]),
+        },
+        "search_seconds": search_seconds,
+        "fit_seconds": fit_seconds,
+        "jobs": jobs,
+        "cpu_count": os.cpu_count(),
+        "sklearn_version": sklearn.__version__,
+        "python_version": platform.python_version(),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    return pipeline, metadata
+
+
+def update(model_path, df, data_sha1, data_path=dl.DATA_PATH, new_trees=None, time_budget=None, jobs=-1):
+    # Incremental update of a trained artifact with the rows appended to data_path since it was trained
+    metadata = load_metadata(model_path)
+    with open(model_path, "rb") as f:
+        pipeline = pickle.load(f)  # private copy, the registry's instance is in use by the app
+    if not hasattr(pipeline.named_steps["model"], "estimators_"):
+        raise TypeError("Incremental updates need a forest model")
+
+    n_old = metadata["n_rows"]
+    if metadata["data_sha1"] not in history_sha1s(data_path, n_old):
+        raise ValueError(f"The first {n_old} rows of {data_path} changed since {model_path} was trained; "
+                         "run a full training instead")
+    names = tuple(metadata["features"])
+    X, y = training_data(df, names)
+    X_new, y_new = X.iloc[n_old:], y[n_old:]
+    if len(X_new) == 0:
+        raise ValueError(f"No rows were appended to {data_path} since {model_path} was trained")
+    if len(np.unique(y_new)) < 2:
+        raise ValueError("The new rows need both Dropout and non-Dropout students")
+
+    start = time.perf_counter()
+    imputer, scaler, model = (pipeline.named_steps[step] for step in ("imputer", "scaler", "model"))
+    auc_before = float(roc_auc_score(y_new, pipeline.predict_proba(X_new)[:, 1]))
+
+    # imputer: exact medians from the merged value counts (older sidecars: one scan of the history)
+    counts = metadata.get("value_counts") or value_counts(X.iloc[:n_old])
+    counts = {n: merge_counts(counts[n], c) for n, c in value_counts(X_new).items()}
+    imputer.statistics_ = np.array([
+        median_from_counts(*counts[n]) if counts[n][1] else imputer.statistics_[i]
+        for i, n in enumerate(names)
+    ])
+
+    # scaler: running moments, then the old trees are moved into the new scaled space
+    old_params = _scaler_params(scaler)
+    X_new_imputed = imputer.transform(X_new)
+    scaler.partial_fit(X_new_imputed)
+    values = [np.append(counts[n][0], imputer.statistics_[i]) for i, n in enumerate(names)]
+    rescale_thresholds(model, old_params, _scaler_params(scaler), [np.unique(v) for v in values])
+
+    n_trees = len(model.estimators_)
+    if new_trees is None:
+        new_trees = max(1, round(n_trees * len(X_new) / n_old))
+    grow_seconds = grow_forest(model, scaler.transform(X_new_imputed), y_new, new_trees, time_budget, jobs=jobs)
+
+    update_info = {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "new_rows": int(len(X_new)),
+        "trees_added": len(model.estimators_) - n_trees,
+        "trees_total": len(model.estimators_),
+        "auc_new_rows_before": auc_before,
+        "seconds": time.perf_counter() - start,
+        "grow_seconds": grow_seconds,
+    }
+    metadata.update({
+        "data_sha1": data_sha1,
+        "n_rows": int(len(y)),
+        "positive_rate": float(y.mean()),
+        "value_counts": counts,
+        "updates": metadata.get("updates", []) + [update_info],
+    })
+    metadata["params"]["n_estimators"] = len(model.estimators_)
+    return pipeline, metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the course / nocourse dropout pipelines from data.csv.")
+    parser.add_argument("--data", default=dl.DATA_PATH)
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_PATHS), default=list(MODEL_PATHS))
+    parser.add_argument("--cv", type=int, default=5, help="number of stratified CV folds")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits (-1 = all cores)")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--incremental", action="store_true", help="update the existing models with the appended rows")
+    parser.add_argument("--new-trees", type=int, help="trees to add in --incremental mode (default: proportional to the new rows)")
+    parser.add_argument("--time-budget", type=float, help="stop adding trees after this many seconds")
+    args = parser.parse_args()
+
+    data_sha1, df = read_csv(args.data)
+    failed = False
+    for name in args.models:
+        if args.incremental:
+            model_path = os.path.join(args.output_dir, MODEL_PATHS[name])
+            try:
+                pipeline, metadata = update(model_path, df, data_sha1, args.data,
+                                            new_trees=args.new_trees, time_budget=args.time_budget, jobs=args.jobs)
+            except FileNotFoundError:
+                print(f"{model_path}: no {metadata_path(model_path)} found, train it with train.py first")
+                failed = True
+                continue
+            except (ValueError, TypeError) as e:
+                print(f"{model_path}: {e}")
+                failed = True
+                continue
+            metadata = save_artifact(pipeline, model_path, metadata)
+            info = metadata["updates"][-1]
+            print(f"{model_path}: +{info['new_rows']} rows, +{info['trees_added']} trees "
+                  f"({info['trees_total']} total) in {info['seconds']:.1f}s; "
+                  f"AUC on the new rows before the update {info['auc_new_rows_before']:.4f}")
+            continue
+        pipeline, metadata = train(name, df, data_sha1, args.data, cv=args.cv, jobs=args.jobs, seed=args.seed)
+        model_path = os.path.join(args.output_dir, MODEL_PATHS[name])
+        metadata = save_artifact(pipeline, model_path, metadata)
+        print(f"{model_path}: {SCORING} {metadata['cv']['mean']:.4f} ± {metadata['cv']['std']:.4f} "
+              f"({metadata['params']}), search {metadata['search_seconds']:.1f}s, fit {metadata['fit_seconds']:.1f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# tree_arrays.py
+# The pickled pipelines compiled to flat NumPy arrays, plus an evaluator.
+#
+# export() takes the fitted imputer statistics, the scaler parameters and every
+# tree of the ensemble, and concatenates the tree nodes into a handful of arrays
+# (one entry per node, child indices global). Leaves point to themselves, so all
+# rows walk all trees for a fixed max_depth steps with plain fancy indexing.
+# publish() writes the arrays once per model version under .cache/trees/ and
+# attach() memory-maps them read-only, so every worker process of a deployment
+# (see deploy.py) shares the same physical pages.
+#
+# predict_proba() gives the same numbers as pipeline.predict_proba (check with
+# `python tree_parity.py`) without the sklearn/pandas validation overhead, which
+# dominates single-row scoring. sklearn's compiled tree walk wins on big batches
+# (benchmarks.py predict.*.1000), so dropout_proba() only uses the arrays up to
+# MAX_ROWS rows.
+
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+import model_registry as mr
+
+TREE_DIR = os.path.join(".cache", "trees")
+FORMAT = 2  # bump when the exported arrays change
+MAX_ROWS = 512  # above this, the sklearn pipeline is faster than the arrays
+ARRAYS = ("impute", "mean", "scale", "feature", "threshold", "left", "right", "value", "roots")
+
+_lock = threading.Lock()
+_compiled = {}  # abs model path -> (model version, (arrays, manifest) or None if unsupported)
+
+
+def _trees(model):
+    # fitted sklearn trees of a forest (RandomForest/ExtraTrees) or a single decision tree
+    if hasattr(model, "estimators_") and all(hasattr(e, "tree_") for e in np.ravel(model.estimators_)):
+        return [e.tree_ for e in np.ravel(model.estimators_)]
+    if hasattr(model, "tree_"):
+        return [model.tree_]
+    raise TypeError(f"Unsupported model for tree export: {type(model).__name__}")
+
+
+def _preprocessing(pipeline, n_features):
+    imputer = pipeline.named_steps["imputer"]
+    scaler = pipeline.named_steps["scaler"]
+    if getattr(imputer, "add_indicator", False):
+        raise TypeError("Imputers with add_indicator are not supported")
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return (
+        np.asarray(imputer.statistics_, dtype=np.float64),
+        np.asarray(mean, dtype=np.float64),
+        np.asarray(scale, dtype=np.float64),
+    )
+
+
+def export(pipeline):
+    # flat arrays of one (imputer -> scaler -> tree ensemble) pipeline
+    if list(pipeline.named_steps) != ["imputer", "scaler", "model"]:
+        raise TypeError(f"Unsupported pipeline steps: {list(pipeline.named_steps)}")
+    model = pipeline.named_steps["model"]
+    trees = _trees(model)
+    impute, mean, scale = _preprocessing(pipeline, model.n_features_in_)
+
+    sizes = [t.node_count for t in trees]
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    for tree, offset in zip(trees, roots):
+        nodes = np.arange(tree.node_count) + offset
+        is_leaf = tree.children_left == -1
+        feature.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, nodes, tree.children_left + offset).astype(np.int32))
+        right.append(np.where(is_leaf, nodes, tree.children_right + offset).astype(np.int32))
+        counts = tree.value[:, 0, :].astype(np.float64)
+        value.append(counts / counts.sum(axis=1, keepdims=True))
+
+    arrays = {
+        "impute": impute,
+        "mean": mean,
+        "scale": scale,
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left),
+        "right": np.concatenate(right),
+        "value": np.concatenate(value),
+        "roots": roots,
+    }
+    manifest = {
+        "n_trees": len(trees),
+        "n_nodes": len(arrays["feature"]),
+        "max_depth": int(max(t.max_depth for t in trees)),
+        "classes": np.asarray(model.classes_).tolist(),
+        "features": [str(f) for f in pipeline.feature_names_in_],
+    }
+    return arrays, manifest
+
+
+def predict_proba(compiled, X):
+    # compiled: (arrays, manifest) from export()/attach(); X: (n, n_features) in model order
+    arrays, manifest = compiled
+    X = np.array(X, dtype=np.float64, ndmin=2)
+    X = np.where(np.isnan(X), arrays["impute"], X)
+    X -= arrays["mean"]
+    X /= arrays["scale"]
+    X = X.astype(np.float32)  # sklearn trees compare float32 inputs
+
+    rows = np.arange(len(X))[:, None]
+    node = np.broadcast_to(arrays["roots"], (len(X), len(arrays["roots"])))
+    feature, threshold, left, right = arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"]
+    for _ in range(manifest["max_depth"]):
+        go_left = X[rows, feature[node]] <= threshold[node]
+        node = np.where(go_left, left[node], right[node])
+    return arrays["value"][node].mean(axis=1)
+
+
+def arrays_dir(model_path, model_version, tree_dir=TREE_DIR):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    return os.path.join(tree_dir, f"{stem}-{model_version[:16]}-v{FORMAT}")
+
+
+def publish(model_path, tree_dir=TREE_DIR):
+    # write the arrays of the current model version once; returns their directory
+    pipeline, version = mr.get_model(model_path), mr.model_version(model_path)
+    target_dir = arrays_dir(model_path, version, tree_dir)
+    if os.path.exists(os.path.join(target_dir, "manifest.json")):
+        return target_dir
+
+    arrays, manifest = export(pipeline)
+    manifest["model_version"] = version
+    tmp_dir = f"{target_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), arrays[name])
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+
+    try:
+        os.replace(tmp_dir, target_dir)
+    except OSError:
+        # another process published the same version first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target_dir
+
+
+def attach(model_path, tree_dir=TREE_DIR):
+    # read-only memory-mapped (arrays, manifest) of the current model version, or None
+    target_dir = arrays_dir(model_path, mr.model_version(model_path), tree_dir)
+    try:
+        with open(os.path.join(target_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+    except OSError:
+        return None
+    arrays = {name: np.load(os.path.join(target_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+    return arrays, manifest
+
+
+def get_compiled(model_path):
+    # (arrays, manifest) for the current version of the model, or None if it cannot be compiled
+    abs_path = os.path.abspath(model_path)
+    version = mr.model_version(model_path)
+    entry = _compiled.get(abs_path)
+    if entry and entry[0] == version:
+        return entry[1]
+    with _lock:
+        entry = _compiled.get(abs_path)
+        if entry and entry[0] == version:
+            return entry[1]
+        try:
+            publish(model_path)
+            compiled = attach(model_path)
+        except TypeError:
+            compiled = None
+        _compiled[abs_path] = (version, compiled)
+        return compiled
+
+
+def dropout_proba(model_path, X):
+    # Same as model_registry.dropout_proba, from the compiled arrays when the model
+    # allows it and the batch is small
+    compiled = get_compiled(model_path) if len(X) <= MAX_ROWS else None
+    if compiled is None:
+        return mr.dropout_proba(mr.get_model(model_path), X)
+    return 1 - predict_proba(compiled, X)[:, 1]
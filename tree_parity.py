@@ -0,0 +1,78 @@
+# tree_parity.py
+# Checks the compiled tree arrays (tree_arrays.py) against pipeline.predict_proba.
+#
+#   python tree_parity.py --rows 2000 --tol 1e-9
+#
+# For both models it compares the probabilities on rows of data.csv, on the same
+# rows with random missing values (imputer path) and on random inputs outside the
+# data range, then times single-row scoring both ways. Exits with status 1 if any
+# difference is above --tol.
+
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+
+import data_loader as dl
+import features as fs
+import model_registry as mr
+import tree_arrays as ta
+
+MODEL_PATHS = (mr.COURSE_MODEL, mr.NOCOURSE_MODEL)
+
+# the pipelines were fitted on DataFrames and are compared here on plain model-order arrays
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def parity_inputs(X, seed=0):
+    rng = np.random.default_rng(seed)
+    with_nan = X.copy()
+    with_nan[rng.random(X.shape) < 0.2] = np.nan
+    lo, hi = np.nanmin(X, axis=0), np.nanmax(X, axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    wide = rng.uniform(lo - span, hi + span, size=X.shape)
+    return {"data": X, "missing": with_nan, "out_of_range": wide}
+
+
+def time_single_row(fn, x_row, repeat=200):
+    fn(x_row)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(x_row)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def check(model_path, n_rows, tol):
+    pipeline = mr.get_model(model_path)
+    compiled = ta.get_compiled(model_path)
+    if compiled is None:
+        print(f"{model_path}: model cannot be compiled, online scoring uses the sklearn pipeline")
+        return True
+
+    X = fs.frame_array(dl.load_data(), fs.model_features(pipeline))[:n_rows]
+    ok = True
+    for name, inputs in parity_inputs(X).items():
+        diff = np.abs(ta.predict_proba(compiled, inputs) - pipeline.predict_proba(inputs)).max()
+        ok &= diff <= tol
+        print(f"{model_path} [{name:>12}] max |diff| = {diff:.2e} {'ok' if diff <= tol else 'FAIL'}")
+
+    x_row = X[:1]
+    sklearn_ms = time_single_row(pipeline.predict_proba, x_row)
+    arrays_ms = time_single_row(lambda x: ta.predict_proba(compiled, x), x_row)
+    print(f"{model_path} single row: sklearn {sklearn_ms:.3f} ms, arrays {arrays_ms:.3f} ms")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the compiled tree arrays with predict_proba.")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--tol", type=float, default=1e-9)
+    args = parser.parse_args()
+    ok = all([check(path, args.rows, args.tol) for path in MODEL_PATHS])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()